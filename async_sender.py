@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import threading
+
+from pipeline import RateLimiter
+from smtp_pool import RECONNECT_CODES
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSMTPSender:
+    """
+    Send emails from a background asyncio loop over several SMTP connections.
+
+    submit() hands a message to the loop and returns straight away, so the
+    caller (personalization) never waits on SMTP; it only blocks when
+    max_pending messages are already queued. Each of the connections workers
+    holds one aiosmtplib connection, reconnecting after a drop or 421 and after
+    max_messages_per_connection messages. The result of every message is
+    reported to its callback, on the sender's thread.
+
+    Requires aiosmtplib (pip install aiosmtplib).
+    """
+
+    def __init__(
+        self,
+        host,
+        port=587,
+        username=None,
+        password=None,
+        connections=4,
+        rate_limit=None,
+        starttls=True,
+        max_messages_per_connection=100,
+        max_pending=1000,
+        timeout=30,
+    ):
+        """
+        Args:
+            host: SMTP server
+            port: SMTP port
+            username: Login user; no login is attempted if empty
+            password: Login password
+            connections: Concurrent SMTP connections (and workers)
+            rate_limit: Most messages per second to the server (None is unlimited)
+            starttls: Upgrade connections with STARTTLS before logging in
+            max_messages_per_connection: Messages sent before a connection is replaced
+            max_pending: Queued messages before submit() blocks
+            timeout: Socket timeout in seconds
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.connections = connections
+        self.rate_limit = rate_limit
+        self.starttls = starttls
+        self.max_messages_per_connection = max_messages_per_connection
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.stats = {"messages": 0, "failed": 0, "connections": 0, "reconnects": 0}
+        self.loop = None
+        self.queue = None
+        self.thread = None
+        self.workers_done = None
+
+    def start(self):
+        """Start the event loop thread and its workers."""
+        import aiosmtplib
+
+        self.aiosmtplib = aiosmtplib
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, args=(started,), name="smtp-sender", daemon=True
+        )
+        self.thread.start()
+        started.wait()
+        return self
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self.limiter = RateLimiter(self.rate_limit)
+        workers = [
+            self.loop.create_task(self._worker()) for _ in range(self.connections)
+        ]
+        self.workers_done = asyncio.gather(*workers)
+        self.loop.call_soon(started.set)
+        self.loop.run_until_complete(self.workers_done)
+        self.loop.close()
+
+    async def _connect(self):
+        client = self.aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            start_tls=self.starttls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self.stats["connections"] += 1
+        return client
+
+    @staticmethod
+    async def _disconnect(client):
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    def _should_reconnect(self, error):
+        if isinstance(error, self.aiosmtplib.SMTPResponseException):
+            return error.code in RECONNECT_CODES
+        return isinstance(error, (self.aiosmtplib.SMTPServerDisconnected, OSError))
+
+    async def _worker(self):
+        client = None
+        sent_on_client = 0
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                break
+            msg, callback = item
+            # Sleep on the loop rather than in RateLimiter.wait()
+            delay = self.limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+
+            error = None
+            for attempt in range(2):
+                try:
+                    if client is None:
+                        client = await self._connect()
+                        sent_on_client = 0
+                    await client.send_message(msg)
+                    error = None
+                    break
+                except Exception as e:
+                    error = e
+                    if client is not None and self._should_reconnect(e):
+                        client.close()
+                        client = None
+                        if attempt == 0:
+                            self.stats["reconnects"] += 1
+                            continue
+                    break
+
+            if error is None:
+                self.stats["messages"] += 1
+                sent_on_client += 1
+                if sent_on_client >= self.max_messages_per_connection:
+                    await self._disconnect(client)
+                    client = None
+            else:
+                self.stats["failed"] += 1
+
+            if callback:
+                try:
+                    callback(error is None, error)
+                except Exception:
+                    logger.exception("Error in send callback")
+
+        if client is not None:
+            await self._disconnect(client)
+
+    def submit(self, msg, callback=None):
+        """
+        Queue a message for sending.
+
+        Args:
+            msg: email.message.Message to send
+            callback: Optional callable(success, error) run once the message is
+                sent or has failed, on the sender's thread
+        """
+        asyncio.run_coroutine_threadsafe(
+            self.queue.put((msg, callback)), self.loop
+        ).result()
+
+    async def _discard_queued(self):
+        discarded = 0
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            discarded += 1
+        return discarded
+
+    def close(self, discard=False):
+        """
+        Send every queued message, then close the connections and stop the loop.
+
+        Args:
+            discard: Drop queued messages instead of sending them (on interrupt);
+                messages already being sent still finish, and the callbacks of
+                dropped ones are not called
+        """
+        if self.thread is None:
+            return
+        if discard:
+            discarded = asyncio.run_coroutine_threadsafe(
+                self._discard_queued(), self.loop
+            ).result()
+            if discarded:
+                logger.info(f"Discarded {discarded} queued messages")
+        for _ in range(self.connections):
+            asyncio.run_coroutine_threadsafe(self.queue.put(None), self.loop).result()
+        self.thread.join()
+        self.thread = None
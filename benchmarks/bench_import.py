@@ -0,0 +1,118 @@
+"""
+Check that importing the CLI modules stays fast and free of heavy dependencies.
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The script prints its cumulative import time and the slowest imports it pulled
+in, and exits with an error if a heavy dependency (selenium, rocketreach,
+pandas, requests, ...) was loaded or the time exceeds --max-ms.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --max-ms 150 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that may only be imported when the feature needing them is used
+HEAVY_MODULES = [
+    "selenium",
+    "webdriver_manager",
+    "rocketreach",
+    "rocketreach_browser",
+    "linkedin_scraper",
+    "pandas",
+    "numpy",
+    "requests",
+    "aiosmtplib",
+]
+
+CHECKED_MODULES = ["emailing", "search"]
+
+
+def import_profile(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: (cumulative microseconds, module name) for the module and every
+        import it triggered, leaving out the interpreter's own startup imports
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    # A module's line comes after the lines of the imports it triggered, which
+    # are indented below it; top-level lines start a new block
+    block = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        block.append((int(cumulative), name.strip()))
+        if len(name) - len(name.lstrip()) == 1:
+            if name.strip() == module:
+                return block
+            block = []
+    return block
+
+
+def time_command(args, runs=5):
+    """Return the fastest wall time in milliseconds of a command over a few runs."""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, capture_output=True, check=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=200,
+        help="Most cumulative import time allowed per module (default: 200)",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to show")
+    args = parser.parse_args()
+
+    failures = []
+    for module in CHECKED_MODULES:
+        imports = import_profile(module)
+        total = imports[-1][0] if imports else 0
+        loaded = {name.split(".")[0] for _, name in imports}
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+
+        print(f"\n{module}: {total / 1000:.1f} ms")
+        for us, name in sorted(imports, reverse=True)[: args.top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)}")
+        if total / 1000 > args.max_ms:
+            failures.append(
+                f"{module} takes {total / 1000:.1f} ms to import (max {args.max_ms:.0f})"
+            )
+
+    help_ms = time_command([sys.executable, "emailing.py", "--help"])
+    print(f"\nemailing.py --help: {help_ms:.0f} ms wall time (interpreter included)")
+
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
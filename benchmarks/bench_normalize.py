@@ -0,0 +1,96 @@
+"""
+Measure contact normalization throughput: the per-row iterrows() loop that
+process_csv() used to run versus the column-wise normalize_contacts().
+
+    python benchmarks/bench_normalize.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalize import normalize_contacts  # noqa: E402
+
+
+def make_frame(rows, null_rate=0.2, seed=0):
+    """Build a contacts DataFrame shaped like a CRM export, with missing values."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "Name": [f"Contact {i}" for i in range(rows)],
+            "Email ID": [f"contact{i}@example.com" for i in range(rows)],
+            "LinkedIn IDs": [
+                f"https://www.linkedin.com/in/contact-{i}" for i in range(rows)
+            ],
+            "Title": rng.choice(["Partner", "Principal", "Portfolio Manager"], rows),
+            "Account Name": [f"Firm {i % 500}" for i in range(rows)],
+            "AUM": rng.choice(["$500M", "$1.2B", "$20B"], rows),
+            "Account Type": rng.choice(["Family Office", "RIA", "Endowment"], rows),
+            "Contact Type": rng.choice(["Decision Maker", "Analyst"], rows),
+            "Location": rng.choice(["New York", "Boston", "Chicago"], rows),
+            "Notes": rng.choice(["", "Met at conference", "Warm intro"], rows),
+        }
+    )
+    for column in ["Title", "AUM", "Account Type", "Contact Type", "Location", "Notes"]:
+        frame.loc[rng.random(rows) < null_rate, column] = np.nan
+    return frame
+
+
+COLUMN_MAP = {
+    "linkedin_url": "LinkedIn IDs",
+    "email": "Email ID",
+    "name": "Name",
+    "company": "Account Name",
+    "position": "Title",
+}
+
+
+def normalize_iterrows(df, column_map):
+    """The previous per-row implementation, kept here for comparison."""
+    records = []
+    for _, row in df.iterrows():
+        contact_data = {}
+        for standard_field, csv_field in column_map.items():
+            if csv_field in row and pd.notna(row[csv_field]):
+                contact_data[standard_field] = row[csv_field]
+        for col in df.columns:
+            if pd.notna(row[col]) and col not in column_map.values():
+                field_name = col.lower().replace(" ", "_")
+                contact_data[field_name] = row[col]
+        records.append(contact_data)
+    return records
+
+
+def measure(label, func, df):
+    started = time.perf_counter()
+    records = func(df, COLUMN_MAP)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<12} {len(df)} rows in {elapsed:.2f}s ({len(df) / elapsed:,.0f} rows/s)"
+    )
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument(
+        "--skip-iterrows", action="store_true", help="Only time normalize_contacts()"
+    )
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    vectorized = measure("vectorized", normalize_contacts, df)
+    if not args.skip_iterrows:
+        per_row = measure("iterrows", normalize_iterrows, df)
+        assert per_row == vectorized, "implementations disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure personalization throughput against the local fake Claude server.
+
+    python benchmarks/bench_personalize.py --contacts 200 --latency 0.3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_claude_server import start_server  # noqa: E402
+
+
+def make_contacts(count):
+    return [
+        {
+            "name": f"Contact {i}",
+            "position": "Portfolio Manager",
+            "company": f"Firm {i % 50}",
+            "aum": f"${(i % 9) + 1}00M",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contacts", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="Make the fake server answer 429 above this many concurrent requests",
+    )
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, max_in_flight=args.max_in_flight)
+    os.environ["CLAUDE_API_BASE"] = server.base_url
+    os.environ.setdefault("CLAUDE_API_KEY", "fake-key")
+
+    from emailing import EmailProcessor
+
+    contacts = make_contacts(args.contacts)
+    template = 'Hey {{first_name:"there"}},\n\nYour experience doing xxx at xxxxxxx.'
+    for concurrency in args.concurrency:
+        processor = EmailProcessor(
+            template, "Benchmark", concurrency=concurrency, max_concurrency=concurrency
+        )
+        started = time.perf_counter()
+        emails = processor.personalize_many(contacts, template)
+        elapsed = time.perf_counter() - started
+        processor.cleanup()
+        assert len(emails) == len(contacts)
+        print(
+            f"concurrency={concurrency:<3} {len(contacts)} emails in {elapsed:.2f}s "
+            f"({len(contacts) / elapsed:.1f} emails/s, "
+            f"{processor.claude.stats['throttled']} throttled, "
+            f"final limit {int(processor.claude.limiter.limit)})"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Compare one SMTP connection per email with the pooled sender, against a local
+aiosmtpd sink (pip install aiosmtpd).
+
+    python benchmarks/bench_smtp.py --messages 500 --connect-delay 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import sys
+import time
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import SMTP  # noqa: E402
+
+from smtp_pool import SMTPPool  # noqa: E402
+
+
+class SinkHandler:
+    """Accept and count every message."""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+class SlowHandshakeSMTP(SMTP):
+    """Delay the greeting to stand in for the TLS and login round trips."""
+
+    connect_delay = 0.0
+
+    async def _handle_client(self):
+        await asyncio.sleep(self.connect_delay)
+        await super()._handle_client()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SinkController(Controller):
+    def __init__(self, handler, connect_delay):
+        super().__init__(handler, hostname="127.0.0.1", port=free_port())
+        self.connect_delay = connect_delay
+
+    def factory(self):
+        server = SlowHandshakeSMTP(self.handler)
+        server.connect_delay = self.connect_delay
+        return server
+
+
+def make_message(i):
+    msg = MIMEText(f"Benchmark message {i}")
+    msg["From"] = "bench@example.com"
+    msg["To"] = f"contact{i}@example.com"
+    msg["Subject"] = "Benchmark"
+    return msg
+
+
+def send_unpooled(host, port, count):
+    """What send_email() used to do: connect, send and quit for every message."""
+    for i in range(count):
+        server = smtplib.SMTP(host, port)
+        server.send_message(make_message(i))
+        server.quit()
+
+
+def send_pooled(host, port, count, max_messages):
+    pool = SMTPPool(
+        host, port, starttls=False, max_messages_per_connection=max_messages
+    )
+    for i in range(count):
+        pool.send_message(make_message(i))
+    pool.close()
+    return pool.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument(
+        "--connect-delay",
+        type=float,
+        default=0.05,
+        help="Seconds the sink waits before greeting each new connection",
+    )
+    parser.add_argument("--max-messages-per-connection", type=int, default=100)
+    args = parser.parse_args()
+
+    handler = SinkHandler()
+    controller = SinkController(handler, args.connect_delay)
+    controller.start()
+    host, port = controller.hostname, controller.port
+
+    started = time.perf_counter()
+    send_unpooled(host, port, args.messages)
+    unpooled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    stats = send_pooled(host, port, args.messages, args.max_messages_per_connection)
+    pooled = time.perf_counter() - started
+
+    controller.stop()
+    assert handler.received == 2 * args.messages
+
+    print(
+        f"unpooled: {args.messages} messages in {unpooled:.2f}s "
+        f"({args.messages / unpooled:.1f} msg/s, {args.messages} connections)"
+    )
+    print(
+        f"pooled:   {args.messages} messages in {pooled:.2f}s "
+        f"({args.messages / pooled:.1f} msg/s, {stats['connections']} connections, "
+        f"{stats['recycled']} recycled)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Local stand-in for the Claude Messages API, for testing and benchmarks.
+
+Run it and point emailing.py at it:
+
+    python benchmarks/fake_claude_server.py --port 8765 --latency 0.5
+    CLAUDE_API_BASE=http://127.0.0.1:8765 python emailing.py contacts.csv --test
+
+Message Batches (/v1/messages/batches) are supported as well; a batch ends
+--batch-latency seconds after it is created.
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeClaudeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("content-length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        if self.path == "/v1/messages":
+            request = self._read_json()
+            if self.server.should_throttle():
+                self._send_json(
+                    429,
+                    {"type": "error", "error": {"type": "rate_limit_error"}},
+                    headers={"retry-after": "1"},
+                )
+                return
+            self.server.record_request(request)
+            time.sleep(self.server.latency)
+            message = fake_message(request)
+            message["usage"].update(self.server.prompt_cache_usage(request))
+            with self.server.lock:
+                self.server.in_flight -= 1
+            self._send_json(200, message)
+        elif self.path == "/v1/messages/batches":
+            batch = self.server.create_batch(self._read_json()["requests"])
+            self._send_json(200, self.server.batch_status(batch))
+        else:
+            self._send_json(404, {"type": "error", "error": {"type": "not_found"}})
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[:3] != ["v1", "messages", "batches"] or len(parts) < 4:
+            self._send_json(404, {"type": "error", "error": {"type": "not_found"}})
+            return
+
+        batch = self.server.batches.get(parts[3])
+        if batch is None:
+            self._send_json(404, {"type": "error", "error": {"type": "not_found"}})
+        elif len(parts) == 4:
+            self._send_json(200, self.server.batch_status(batch))
+        elif parts[4] == "results":
+            lines = [
+                json.dumps(
+                    {
+                        "custom_id": entry["custom_id"],
+                        "result": {
+                            "type": "succeeded",
+                            "message": fake_message(entry["params"]),
+                        },
+                    }
+                )
+                for entry in batch["requests"]
+            ]
+            payload = ("\n".join(lines) + "\n").encode("utf-8")
+            self.send_response(200)
+            self.send_header("content-type", "application/x-jsonl")
+            self.send_header("content-length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+
+def fake_message(request):
+    """Build a Messages API response that echoes the end of the prompt."""
+    prompt = request["messages"][-1]["content"]
+    if isinstance(prompt, list):
+        prompt = " ".join(block.get("text", "") for block in prompt)
+    return {
+        "id": "msg_fake",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model"),
+        "content": [{"type": "text", "text": f"Personalized email:\n{prompt[-200:]}"}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 50},
+    }
+
+
+class FakeClaudeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, batch_latency=1.0, max_in_flight=None):
+        super().__init__(address, FakeClaudeHandler)
+        self.latency = latency
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.throttled = 0
+        self.batch_latency = batch_latency
+        self.requests_seen = 0
+        self.batches = {}
+        self.cached_prefixes = set()
+        self.lock = threading.Lock()
+
+    def should_throttle(self):
+        """Answer 429 when more than max_in_flight messages are being served."""
+        with self.lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                self.throttled += 1
+                return True
+            self.in_flight += 1
+            return False
+
+    def record_request(self, request):
+        with self.lock:
+            self.requests_seen += 1
+
+    def prompt_cache_usage(self, request):
+        """Report cache writes the first time a cacheable system prefix is seen, reads after."""
+        system = request.get("system")
+        if not isinstance(system, list) or not any(
+            "cache_control" in block for block in system
+        ):
+            return {}
+
+        prefix = json.dumps(system, sort_keys=True)
+        tokens = len(prefix) // 4
+        with self.lock:
+            seen = prefix in self.cached_prefixes
+            self.cached_prefixes.add(prefix)
+        if seen:
+            return {"cache_creation_input_tokens": 0, "cache_read_input_tokens": tokens}
+        return {"cache_creation_input_tokens": tokens, "cache_read_input_tokens": 0}
+
+    def create_batch(self, requests_list):
+        batch = {
+            "id": f"msgbatch_{uuid.uuid4().hex}",
+            "requests": requests_list,
+            "created_at": time.time(),
+        }
+        with self.lock:
+            self.batches[batch["id"]] = batch
+            self.requests_seen += len(requests_list)
+        return batch
+
+    def batch_status(self, batch):
+        ended = time.time() - batch["created_at"] >= self.batch_latency
+        count = len(batch["requests"])
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "results_url": (
+                f"{self.base_url}/v1/messages/batches/{batch['id']}/results"
+                if ended
+                else None
+            ),
+        }
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(port=0, latency=0.0, batch_latency=1.0, max_in_flight=None):
+    """
+    Start the fake server on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        latency: Seconds to wait before answering each message
+        batch_latency: Seconds before a Message Batch reports that it has ended
+        max_in_flight: Concurrent messages served before answering 429 (None is unlimited)
+
+    Returns:
+        FakeClaudeServer; use its base_url as CLAUDE_API_BASE and call shutdown() when done
+    """
+    server = FakeClaudeServer(
+        ("127.0.0.1", port),
+        latency=latency,
+        batch_latency=batch_latency,
+        max_in_flight=max_in_flight,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Claude API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="Seconds per message response"
+    )
+    parser.add_argument(
+        "--batch-latency",
+        type=float,
+        default=5.0,
+        help="Seconds before a Message Batch ends",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="Concurrent messages served before answering 429",
+    )
+    args = parser.parse_args()
+
+    server = FakeClaudeServer(
+        ("127.0.0.1", args.port),
+        latency=args.latency,
+        batch_latency=args.batch_latency,
+        max_in_flight=args.max_in_flight,
+    )
+    print(f"Fake Claude API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+DEFAULT_API_BASE = "https://api.anthropic.com"
+API_VERSION = "2023-06-01"
+
+# 429 is rate limiting and 529 is overload; both mean "slow down"
+THROTTLE_STATUS_CODES = {429, 529}
+RETRYABLE_STATUS_CODES = THROTTLE_STATUS_CODES | {408, 409, 500, 502, 503, 504}
+
+
+class ClaudeAPIError(Exception):
+    """Raised when the Claude API returns a non-200 response."""
+
+    def __init__(self, status_code, body):
+        super().__init__(f"Claude API Error: {status_code} - {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+class AIMDLimiter:
+    """
+    Limit on in-flight requests that adapts to throttling.
+
+    Each successful request raises the limit by roughly one per window of
+    requests (additive increase); a throttled request halves it (multiplicative
+    decrease), at most once per cooldown so a burst of 429s counts as one signal.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, decrease=0.5, cooldown=1.0):
+        """
+        Args:
+            initial: Starting number of requests allowed in flight
+            minimum: Lowest the limit may fall to
+            maximum: Highest the limit may grow to
+            decrease: Factor applied to the limit when throttled
+            cooldown: Seconds after a decrease during which further throttles are ignored
+        """
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Block until another request may be sent."""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False):
+        """Finish a request and adjust the limit based on its outcome."""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.time()
+            if throttled:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+def retry_after_seconds(response):
+    """Return the delay requested by a retry-after header, or None."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClaudeClient:
+    """Claude Messages API client that keeps its HTTPS connections alive."""
+
+    def __init__(
+        self,
+        api_key,
+        api_base=DEFAULT_API_BASE,
+        max_connections=8,
+        timeout=120,
+        initial_concurrency=None,
+        max_retries=6,
+        backoff_base=1.0,
+        backoff_max=60.0,
+    ):
+        """
+        Args:
+            api_key: Claude API key
+            api_base: Base URL of the API, e.g. a local stand-in server for testing
+            max_connections: Size of the keep-alive connection pool, and the
+                most requests ever allowed in flight
+            timeout: Seconds to wait for a response
+            initial_concurrency: Starting in-flight limit (defaults to max_connections)
+            max_retries: Retries for throttled, overloaded or failed requests
+            backoff_base: First backoff delay in seconds, doubled on each retry
+            backoff_max: Longest backoff delay in seconds
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = AIMDLimiter(
+            initial=initial_concurrency or max_connections, maximum=max_connections
+        )
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+        self.stats_lock = threading.Lock()
+
+        self.api_base = api_base.rstrip("/")
+        self.messages_url = f"{self.api_base}/v1/messages"
+        self.batches_url = f"{self.api_base}/v1/messages/batches"
+        self.timeout = timeout
+
+        # Imported here so importing this module stays fast
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.requests = requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "x-api-key": api_key or "",
+                "anthropic-version": API_VERSION,
+                "content-type": "application/json",
+            }
+        )
+
+    def create_message(self, payload):
+        """
+        Send one Messages API request.
+
+        Args:
+            payload: Request body (model, max_tokens, system, messages, ...)
+
+        Returns:
+            dict: Decoded JSON response
+        """
+        return self._request("POST", self.messages_url, json=payload)
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _request(self, method, url, **kwargs):
+        """
+        Send a request through the concurrency limiter, retrying transient failures.
+
+        Throttled (429/529) responses shrink the in-flight limit and are retried
+        after their retry-after delay; other transient errors use jittered backoff.
+
+        Returns:
+            dict: Decoded JSON response
+        """
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            self._count("requests")
+            throttled = False
+            delay = None
+            try:
+                response = self.session.request(
+                    method, url, timeout=self.timeout, **kwargs
+                )
+            except (self.requests.ConnectionError, self.requests.Timeout) as e:
+                error = e
+            else:
+                if response.status_code == 200:
+                    return response.json()
+
+                error = ClaudeAPIError(response.status_code, response.text)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise error
+                throttled = response.status_code in THROTTLE_STATUS_CODES
+                delay = retry_after_seconds(response)
+            finally:
+                self.limiter.release(throttled=throttled)
+
+            if throttled:
+                self._count("throttled")
+            if attempt == self.max_retries:
+                raise error
+
+            self._count("retries")
+            time.sleep(delay if delay is not None else self._backoff(attempt))
+
+    def create_batch(self, requests_list):
+        """
+        Submit a Message Batch.
+
+        Args:
+            requests_list: List of {"custom_id": ..., "params": {...}} entries
+
+        Returns:
+            dict: The batch object, including its id and processing_status
+        """
+        return self._request("POST", self.batches_url, json={"requests": requests_list})
+
+    def get_batch(self, batch_id):
+        """Return the current state of a Message Batch."""
+        return self._request("GET", f"{self.batches_url}/{batch_id}")
+
+    def wait_for_batch(self, batch_id, poll_interval=30, on_poll=None):
+        """
+        Poll a Message Batch until it has finished processing.
+
+        Args:
+            batch_id: ID returned by create_batch()
+            poll_interval: Seconds between status checks
+            on_poll: Optional callable receiving the batch object after each check
+
+        Returns:
+            dict: The ended batch object
+        """
+        while True:
+            batch = self.get_batch(batch_id)
+            if on_poll:
+                on_poll(batch)
+            if batch.get("processing_status") == "ended":
+                return batch
+            time.sleep(poll_interval)
+
+    def iter_batch_results(self, batch):
+        """
+        Stream the results of an ended Message Batch.
+
+        Args:
+            batch: Batch object returned by wait_for_batch()
+
+        Yields:
+            dict: One result per request, with custom_id and result
+        """
+        results_url = (
+            batch.get("results_url") or f"{self.batches_url}/{batch['id']}/results"
+        )
+        with self.session.get(
+            results_url, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code != 200:
+                raise ClaudeAPIError(response.status_code, response.text)
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
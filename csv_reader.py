@@ -0,0 +1,144 @@
+import codecs
+import logging
+
+logger = logging.getLogger(__name__)
+
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def detect_encoding(path, sample_size=64 * 1024):
+    """
+    Guess a file's encoding from its first bytes.
+
+    Args:
+        path: File to inspect
+        sample_size: Number of bytes to sample
+
+    Returns:
+        str: "utf-8-sig" or "utf-16" if the file starts with a BOM, "utf-8" if
+        the sample decodes as UTF-8, and "latin1" otherwise
+    """
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+
+    for bom, encoding in BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+
+    # The sample may end partway through a multi-byte character; an
+    # incremental decoder only complains about bytes that are really invalid
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+class Latin1Fallback:
+    """
+    Codec error handler that decodes invalid bytes as Latin-1.
+
+    The encoding is detected from a prefix of the file, so a byte further in
+    may not fit it; decoding that byte as Latin-1 (as a whole-file Latin-1
+    read would) keeps the stream going instead of failing halfway through.
+    """
+
+    name = "csv_reader_latin1_fallback"
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, error):
+        self.count += 1
+        return error.object[error.start : error.end].decode("latin1"), error.end
+
+
+LATIN1_FALLBACK = Latin1Fallback()
+codecs.register_error(Latin1Fallback.name, LATIN1_FALLBACK)
+
+
+class ContactCSVReader:
+    """
+    Stream a contacts CSV in chunks instead of loading it whole.
+
+    The encoding is detected from a prefix of the file (bytes later on that
+    don't fit it are decoded as Latin-1, with a warning), and Google Sheets
+    exports whose real headers sit in the first row (so pandas names every
+    column "Unnamed: N") are recognised once, from the header alone.
+    """
+
+    def __init__(self, path, chunksize=10000):
+        """
+        Args:
+            path: CSV file
+            chunksize: Rows per chunk
+        """
+        self.path = path
+        self.chunksize = chunksize
+        self.encoding = detect_encoding(path)
+        self.header_row = 0
+        self.raw_columns = list(self._read(nrows=0).columns)
+
+        # If first row has column names as values (common in Google Sheets exports)
+        if self.raw_columns and all(
+            str(column).startswith("Unnamed:") for column in self.raw_columns
+        ):
+            logger.info("Detected unnamed columns with headers in first row")
+            self.header_row = 1
+        self.columns = list(self._read(nrows=0).columns)
+
+    def _read(self, **kwargs):
+        import pandas as pd
+
+        return pd.read_csv(
+            self.path,
+            encoding=self.encoding,
+            encoding_errors=Latin1Fallback.name,
+            header=self.header_row,
+            **kwargs,
+        )
+
+    def header(self):
+        """Return an empty DataFrame with the CSV's columns (for column mapping)."""
+        import pandas as pd
+
+        return pd.DataFrame(columns=self.columns)
+
+    def chunks(self, limit=None):
+        """
+        Yield the CSV as DataFrames of up to chunksize rows.
+
+        Row labels continue across chunks, so they match the row numbers of
+        the whole file.
+
+        Args:
+            limit: Stop after this many rows (default: read everything)
+
+        Yields:
+            pandas.DataFrame: The next chunk
+        """
+        remaining = limit
+        fallbacks = LATIN1_FALLBACK.count
+        with self._read(chunksize=self.chunksize) as reader:
+            for chunk in reader:
+                if LATIN1_FALLBACK.count > fallbacks:
+                    logger.warning(
+                        f"{self.path} has bytes that aren't valid {self.encoding} "
+                        f"(near row {chunk.index[0]}); decoded them as Latin-1"
+                    )
+                    fallbacks = LATIN1_FALLBACK.count
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+                    chunk = chunk.iloc[:remaining]
+                    remaining -= len(chunk)
+                yield chunk
+
+    def first_row(self):
+        """Return the first data row as a Series, or None for an empty file."""
+        df = self._read(nrows=1)
+        return df.iloc[0] if len(df) else None
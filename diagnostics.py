@@ -0,0 +1,173 @@
+import atexit
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+
+class DiagnosticsSink:
+    """
+    Capture debugging artifacts for failed browser lookups without blocking the run.
+
+    Only a sample of failures is captured. The page source and screenshot are
+    grabbed on the caller's thread (a WebDriver is not thread-safe) and written
+    to per-URL files on a background thread, with the oldest artifacts removed
+    once the directory grows past its size cap.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        directory="rocketreach_debug",
+        sample_rate=0.1,
+        max_total_bytes=50 * 1024 * 1024,
+        max_pending=20,
+    ):
+        """
+        Args:
+            directory: Folder the artifacts are written to
+            sample_rate: Fraction of failures to capture (0 disables, 1 captures all)
+            max_total_bytes: Disk budget for the folder; oldest files are deleted first
+            max_pending: Captures queued for writing before new ones are dropped
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_total_bytes = max_total_bytes
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.stats = {"failures": 0, "captured": 0, "dropped": 0, "evicted": 0}
+        self.files = []  # (path, size) oldest first
+        self.total_bytes = 0
+        self.writer = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """
+        Return the process-wide sink configured from environment variables.
+
+        RR_DEBUG_DIR, RR_DEBUG_SAMPLE_RATE and RR_DEBUG_MAX_MB override the
+        defaults. The sink is flushed when the interpreter exits.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(
+                    directory=os.getenv("RR_DEBUG_DIR", "rocketreach_debug"),
+                    sample_rate=float(os.getenv("RR_DEBUG_SAMPLE_RATE", 0.1)),
+                    max_total_bytes=int(
+                        float(os.getenv("RR_DEBUG_MAX_MB", 50)) * 1024 * 1024
+                    ),
+                )
+                atexit.register(cls._default.close)
+            return cls._default
+
+    def _start_writer(self):
+        with self.lock:
+            if self.writer:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._index_existing_files()
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+
+    def _index_existing_files(self):
+        """Count artifacts left by earlier runs against the disk budget."""
+        existing = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                existing.append((stat.st_mtime, entry.path, stat.st_size))
+        existing.sort()
+        self.files = [(path, size) for _, path, size in existing]
+        self.total_bytes = sum(size for _, size in self.files)
+
+    def capture(self, driver, url, reason=""):
+        """
+        Record a failure and, if sampled, queue the page artifacts for writing.
+
+        Args:
+            driver: The WebDriver showing the failed page
+            url: The URL that was being looked up
+            reason: Short description written alongside the artifacts
+
+        Returns:
+            Base path of the queued artifacts, or None if the failure was not captured
+        """
+        with self.lock:
+            self.stats["failures"] += 1
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if self.pending.full():
+            with self.lock:
+                self.stats["dropped"] += 1
+            return None
+
+        try:
+            page_source = driver.page_source
+            screenshot = driver.get_screenshot_as_png()
+        except Exception as e:
+            print(f"Error capturing diagnostics for {url}: {e}")
+            return None
+
+        self._start_writer()
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", url).strip("_")[-80:]
+        base_path = os.path.join(
+            self.directory, f"{slug}_{int(time.time() * 1000)}_{os.getpid()}"
+        )
+        artifacts = [
+            (f"{base_path}.html", page_source.encode("utf-8", errors="replace")),
+            (f"{base_path}.png", screenshot),
+            (f"{base_path}.txt", f"url: {url}\nreason: {reason}\n".encode("utf-8")),
+        ]
+        try:
+            self.pending.put_nowait(artifacts)
+        except queue.Full:
+            with self.lock:
+                self.stats["dropped"] += 1
+            return None
+
+        with self.lock:
+            self.stats["captured"] += 1
+        return base_path
+
+    def _write_loop(self):
+        while True:
+            artifacts = self.pending.get()
+            if artifacts is None:
+                self.pending.task_done()
+                return
+            for path, content in artifacts:
+                if len(content) > self.max_total_bytes:
+                    with self.lock:
+                        self.stats["dropped"] += 1
+                    continue
+                try:
+                    self._make_room(len(content))
+                    with open(path, "wb") as f:
+                        f.write(content)
+                    self.files.append((path, len(content)))
+                    self.total_bytes += len(content)
+                except Exception as e:
+                    print(f"Error writing diagnostics file {path}: {e}")
+            self.pending.task_done()
+
+    def _make_room(self, size):
+        while self.files and self.total_bytes + size > self.max_total_bytes:
+            path, old_size = self.files.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.total_bytes -= old_size
+            with self.lock:
+                self.stats["evicted"] += 1
+
+    def close(self):
+        """Wait for queued artifacts to be written and stop the writer thread."""
+        if self.writer and self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join(timeout=30)
+        self.writer = None
@@ -1,32 +1,51 @@
 import argparse
 import json
+import logging
 import os
 import re
-import smtplib
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from functools import partial
+from itertools import chain, takewhile
 
-import pandas as pd
-import requests
 from dotenv import load_dotenv
 
-from linkedin_scraper import LinkedInScraper
+from claude_client import DEFAULT_API_BASE, ClaudeClient
+from csv_reader import ContactCSVReader
+from llm_cache import ResponseCache
+from model_router import ModelRouter
+from normalize import contact_fields, normalize_contacts
+from outbox import Outbox
+from pipeline import Pipeline, RateLimiter, Stage
+from profile_store import ProfileStore
+from prompt_context import ContextBuilder, contact_name, is_empty
+from records import Contact, Profile
+from run_ledger import BodyCSVWriter, RunLedger
+from segments import (
+    COMPANY_TOKEN,
+    FIRST_NAME_TOKEN,
+    fill_tokens,
+    group_segments,
+    segment_contact,
+)
+from smtp_pool import SMTPPool
+from suppression import SuppressionIndex, recipient_keys
+from template_renderer import LocalRenderer
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-import logging
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("emailing.log"), logging.StreamHandler()],
-)
 logger = logging.getLogger(__name__)
 
+
+class LinkedInUnavailable(Exception):
+    """The LinkedIn scraper could not be set up, so the run stops."""
+
+
 # Define common column mappings - specifically matching Contacts - Sheet1.csv format
 COLUMN_MAPPINGS = {
     "linkedin_url": [
@@ -49,7 +68,17 @@ COLUMN_MAPPINGS = {
 
 
 class EmailProcessor:
-    def __init__(self, template, subject, test_mode=False):
+    def __init__(
+        self,
+        template,
+        subject,
+        test_mode=False,
+        concurrency=4,
+        llm_cache=None,
+        max_concurrency=None,
+        prompt_token_budget=300,
+        model_tier="auto",
+    ):
         """
         Initialize the email processor
 
@@ -57,12 +86,34 @@ class EmailProcessor:
             template (str): Email template with placeholders
             subject (str): Email subject line
             test_mode (bool): If True, don't actually send emails
+            concurrency (int): Number of Claude requests to start with in flight
+            llm_cache (ResponseCache, optional): Cache of personalized emails;
+                defaults to a disabled cache
+            max_concurrency (int, optional): Most Claude requests allowed in flight
+                as the limit adapts to throttling; defaults to 4x concurrency
+            prompt_token_budget (int): Most estimated tokens of recipient context
+                sent to Claude per contact
+            model_tier (str): "auto" to route each contact to the fast or standard
+                model, or a tier name to use for every contact
         """
         self.template = template
         self.subject = subject
         self.test_mode = test_mode
+        self.concurrency = max(1, concurrency)
+        self.max_concurrency = max(self.concurrency, max_concurrency or concurrency * 4)
         self.body_to_csv = False  # New option to save bodies to CSV instead of sending
-        self.email_bodies = []  # Storage for email bodies when using body_to_csv
+        self.batch_personalize = False  # Personalize through the Message Batches API
+        self.batch_poll_interval = 30  # Seconds between batch status checks
+        self.local_render = False  # Fill templates locally when the CSV has the data
+        self.segment_personalize = False  # One Claude request per segment of rows
+        self.segment_stats = {"segments": 0, "segment_rows": 0, "per_row": 0}
+        self.local_renderer = LocalRenderer(template)
+        self.llm_rendered = 0  # Emails that went to Claude while local_render is on
+        self.run_stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.body_writer = (
+            None  # Writes email bodies as they come when using body_to_csv
+        )
+        self.body_fields = None  # Body CSV columns, set from the input CSV
 
         # Initialize LinkedIn scraper
         self.linkedin_email = os.getenv("LINKEDIN_EMAIL")
@@ -71,28 +122,82 @@ class EmailProcessor:
 
         # Initialize Claude API settings
         self.claude_api_key = os.getenv("CLAUDE_API_KEY")
-        self.claude_api_url = "https://api.anthropic.com/v1/messages"
+        self.claude = ClaudeClient(
+            self.claude_api_key,
+            api_base=os.getenv("CLAUDE_API_BASE", DEFAULT_API_BASE),
+            max_connections=self.max_concurrency,
+            initial_concurrency=self.concurrency,
+        )
+        self.llm_cache = llm_cache or ResponseCache(enabled=False)
+        self.context_builder = ContextBuilder(token_budget=prompt_token_budget)
+        self.router = ModelRouter(policy=model_tier)
+
+        # Token usage reported by Claude, including prompt-cache reads and writes
+        self.usage = {
+            "requests": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+        self.usage_lock = threading.Lock()
 
         # Initialize SMTP settings
         self.smtp_username = os.getenv("SMTP_USERNAME")
         self.smtp_password = os.getenv("SMTP_PASSWORD")
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("SMTP_PORT", 587))
-
-        # Initialize LinkedIn scraper
+        self.smtp_pool = None  # Opened on the first email actually sent
+        self.async_send = False  # Send through AsyncSMTPSender workers
+        self.smtp_connections = 4  # Concurrent SMTP connections when sending async
+        self.smtp_rate_limit = None  # Most emails per second to the SMTP server
+        self.async_sender = None
+        self.outbox = None  # Outbox recording which emails were delivered
+        self.campaign = subject  # Outbox idempotency keys are (recipient, campaign)
+        # Recipients not to email again, and those already taken by this run
+        self.suppression = SuppressionIndex()
+
+        # Initialize LinkedIn scraper (the browser starts on the first profile visit)
         self.scraper = None
+        self.profile_store = (
+            None  # Profiles scraped before, reused instead of revisited
+        )
+        self.scrape_lock = threading.Lock()
+        self.linkedin_limiter = RateLimiter(1 / 3)  # At most one profile every 3 s
+        # Send from CSV data only, instead of stopping, if LinkedIn can't be set up
+        self.linkedin_fallback = False
+        self.linkedin_failed = False  # The scraper could not be set up
+        self.aborted = False  # The run stopped early; no more rows are read
+
+        # Staged pipeline settings (personalization uses max_concurrency workers)
+        self.enrich_workers = 1
+        self.send_workers = 1
+        self.pipeline = None
 
         # Initialize results tracking
-        self.results = {"total": 0, "sent": 0, "failed": 0, "details": []}
+        # Running counts only; each contact's details go to the JSONL ledger
+        self.results = {"total": 0, "sent": 0, "failed": 0, "skipped": 0}
+        self.results_lock = threading.Lock()
+        self.ledger_path = f"email_ledger_{self.run_stamp}.jsonl"
+        self.ledger = None  # Opened on the first result
 
     def setup_linkedin_scraper(self):
         """Set up and log in to LinkedIn"""
         try:
             logger.info("Setting up LinkedIn scraper...")
+            # Imported here so selenium and rocketreach only load when a
+            # profile has to be visited
+            from linkedin_scraper import LinkedInScraper
+
             self.scraper = LinkedInScraper(
                 email=self.linkedin_email,
                 password=self.linkedin_password,
                 rr_api_key=self.rr_api_key,
+                rr_cache_path=os.getenv("RR_CACHE_PATH"),
+                hedge_lookups=os.getenv("RR_HEDGE_LOOKUPS", "").lower()
+                in ("1", "true", "yes"),
+                rr_browser_sessions=int(os.getenv("RR_BROWSER_SESSIONS", 1)),
+                rr_browser_mode=os.getenv("RR_BROWSER_MODE", "window"),
             )
             self.scraper.setup_driver()
 
@@ -108,18 +213,71 @@ class EmailProcessor:
 
     def get_profile_data(self, linkedin_url):
         """
-        Get profile data from LinkedIn
+        Get profile data from the profile store, or from LinkedIn if it isn't
+        stored or is stale
 
         Args:
             linkedin_url (str): LinkedIn profile URL
 
         Returns:
-            dict: Profile data
+            Profile: Profile data (read like a dict)
         """
+        if self.profile_store:
+            profile_data = self.profile_store.get(linkedin_url)
+            if profile_data:
+                logger.info(f"Reusing stored profile: {linkedin_url}")
+                return profile_data
+
         try:
-            logger.info(f"Scraping profile: {linkedin_url}")
-            profile_data = self.scraper.scrape_profile(linkedin_url)
+            # One browser, so one visit at a time, spaced out to avoid rate limiting
+            with self.scrape_lock:
+                if (
+                    self.scraper is None
+                    and not self.linkedin_failed
+                    and not self.setup_linkedin_scraper()
+                ):
+                    if self.scraper:
+                        self.scraper.close()
+                    self.scraper = None
+                    self.linkedin_failed = True
+                    if self.linkedin_fallback:
+                        logger.error(
+                            "Failed to set up LinkedIn scraper. Continuing with CSV "
+                            "data only (--continue-without-linkedin)."
+                        )
+                        self.scraper = True
+                    else:
+                        logger.error("Failed to set up LinkedIn scraper. Exiting.")
+                        self.aborted = True
+                        if self.pipeline:
+                            self.pipeline.stop()
+                if self.aborted:
+                    raise LinkedInUnavailable("LinkedIn scraper could not be set up")
+                if self.scraper is True:
+                    return None
+
+                self.linkedin_limiter.wait()
+                logger.info(f"Scraping profile: {linkedin_url}")
+                profile_data = self.scraper.scrape_profile(linkedin_url, enrich=False)
+                if profile_data and not self.scraper.lookups_concurrent:
+                    self.scraper.enrich_profile(profile_data)
+
+            # RocketReach lookups run outside the LinkedIn lock, so several
+            # enrich workers can use the RocketReach browser pool at once
+            if profile_data and self.scraper.lookups_concurrent:
+                self.scraper.enrich_profile(profile_data)
+            if profile_data and self.profile_store:
+                # A failed scrape comes back as all "N/A"; storing it would stop
+                # the profile being scraped again until it goes stale
+                if is_empty(profile_data.get("Name")) and is_empty(
+                    profile_data.get("Headline")
+                ):
+                    logger.warning(f"Not storing empty profile: {linkedin_url}")
+                else:
+                    self.profile_store.put(linkedin_url, profile_data)
             return profile_data
+        except LinkedInUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error scraping profile {linkedin_url}: {e}")
             return None
@@ -186,124 +344,326 @@ class EmailProcessor:
         email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
         return bool(re.match(email_pattern, email))
 
-    def personalize_email(self, contact_data, template):
+    def personalization_system_blocks(self, template):
         """
-        Use OpenAI to personalize the email based on contact data
+        Build the system prompt shared by every contact for a template
+
+        The instructions and template are identical for every contact, so they
+        end with a prompt-caching breakpoint and are billed as cache reads
+        after the first request.
 
         Args:
-            contact_data (dict): Contact data from CSV and/or LinkedIn
             template (str): Email template with placeholders
 
         Returns:
-            str: Personalized email
+            list: System content blocks
         """
-        try:
-            # Extract key information with fallbacks
-            name = contact_data.get("Name", "N/A")
-            first_name = name.split()[0] if name and name != "N/A" else "there"
-
-            # First, replace the first_name placeholder
-            basic_template = re.sub(r'\{\{first_name:"[^"]*"\}\}', first_name, template)
-
-            # Format additional context for better personalization
-            context_info = []
-
-            # Add key profile data - using exact column names from the CSV
-            if "Title" in contact_data and contact_data["Title"]:
-                context_info.append(f"- Role/Title: {contact_data['Title']}")
+        instructions = f"""You are an AI assistant helping to personalize an email for a venture capital outreach.
 
-            if "Account Name" in contact_data and contact_data["Account Name"]:
-                context_info.append(
-                    f"- Company/Employer: {contact_data['Account Name']}"
-                )
+Here is the email template with xxx placeholders that need to be replaced:
+{template}
 
-            # Add financial industry specific information
-            if "AUM" in contact_data and contact_data["AUM"]:
-                context_info.append(f"- Assets Under Management: {contact_data['AUM']}")
+The recipient's information is given in the user message. Please personalize the email by:
+- Address the recipient by first name in place of the first_name placeholder
+1. Replacing 'xxx at xxxxxxx' with specific details about their experience/role as a financial advisor
+2. Mention their experience managing assets (their AUM) and their role at their firm
+3. Keep the tone professional but conversational
+4. Don't make up information that isn't in their profile
+5. Don't change any other part of the template
+6. Focus specifically on their financial advisory experience and how it relates to private market investments
+7. If they are a Portfolio Manager, emphasize that aspect of their experience
 
-            if "Account Type" in contact_data and contact_data["Account Type"]:
-                context_info.append(f"- Account Type: {contact_data['Account Type']}")
+Return only the completed email text without explanations."""
+
+        return [
+            {
+                "type": "text",
+                "text": "You are a helpful assistant that personalizes emails for financial industry professionals.",
+            },
+            {
+                "type": "text",
+                "text": instructions,
+                "cache_control": {"type": "ephemeral"},
+            },
+        ]
+
+    def record_usage(self, response_data, latency=None, tier=None):
+        """
+        Add a response's token usage, including prompt-cache reads and writes, to the run totals
 
-            if "Contact Type" in contact_data and contact_data["Contact Type"]:
-                context_info.append(f"- Contact Type: {contact_data['Contact Type']}")
+        Args:
+            response_data (dict): Decoded Messages API response
+            latency (float, optional): Request time in seconds
+            tier (str, optional): Tier the request was sent to; the response's
+                model name is not used, since it may be the resolved name of a
+                configured alias
+        """
+        usage = response_data.get("usage") or {}
+        if tier:
+            self.router.record(tier, usage, latency)
+        with self.usage_lock:
+            self.usage["requests"] += 1
+            for key in (
+                "input_tokens",
+                "output_tokens",
+                "cache_creation_input_tokens",
+                "cache_read_input_tokens",
+            ):
+                self.usage[key] += usage.get(key) or 0
 
-            # Add any other available data
-            for key, value in contact_data.items():
-                if (
-                    key
-                    not in [
-                        "Name",
-                        "Title",
-                        "Account Name",
-                        "AUM",
-                        "Account Type",
-                        "Contact Type",
-                        "LinkedIn IDs",
-                        "Email ID",
-                    ]
-                    and value
-                    and str(value).lower() not in ["n/a", "nan", "none", ""]
-                ):
-                    context_info.append(f"- {key}: {value}")
+    def build_personalization_request(self, contact_data, template):
+        """
+        Build the Claude request that personalizes an email for one contact
 
-            context_text = "\n".join(context_info)
+        Args:
+            contact_data (dict): Contact data from CSV and/or LinkedIn
+            template (str): Email template with placeholders
 
-            # Prompt for OpenAI to fill in the rest - tailored for financial advisors
-            prompt = f"""
-You are an AI assistant helping to personalize an email for a venture capital outreach.
+        Returns:
+            tuple: (request params, cache key, fallback email used if the request fails)
+        """
+        # Extract key information with fallbacks
+        name = contact_name(contact_data)
+        first_name = name.split()[0] if name != "N/A" else "there"
+
+        # Ranked, truncated and de-duplicated context within the token budget
+        context_text = self.context_builder.build(contact_data)
+
+        # A segment prompt stands in for several recipients, whose names and
+        # employers are filled in afterwards
+        instructions = "Return only the completed email text without explanations."
+        if name == FIRST_NAME_TOKEN:
+            instructions = (
+                f"This email goes to several recipients. Write {FIRST_NAME_TOKEN} "
+                f"exactly where their first name belongs and {COMPANY_TOKEN} where "
+                f"their firm's name belongs; never invent a name. {instructions}"
+            )
 
-Here is the recipient's information:
+        # Only the recipient block changes between contacts; it goes last so the
+        # system blocks form a prefix that Claude can serve from its prompt cache.
+        prompt = f"""Here is the recipient's information:
 - Name: {name}
+- First name: {first_name}
 {context_text}
 
-Here is the email template with xxx placeholders that need to be replaced:
-{basic_template}
+{instructions}
+"""
 
-Please personalize the email by:
-- Address the recipient by name
-1. Replacing 'xxx at xxxxxxx' with specific details about their experience/role as a financial advisor
-2. Mention their experience managing assets (AUM: {contact_data.get("AUM", "N/A")}) and their role at {contact_data.get("Account Name", "their firm")}
-3. Keep the tone professional but conversational
-4. Don't make up information that isn't in their profile
-5. Don't change any other part of the template
-6. Focus specifically on their financial advisory experience and how it relates to private market investments
-7. If they are a Portfolio Manager, emphasize that aspect of their experience
+        # Data-light contacts go to the fast model, rich profiles to the standard one
+        tier = self.router.choose(contact_data, context_text)
+        data = {
+            "model": self.router.models[tier],
+            "max_tokens": 1000,
+            "system": self.personalization_system_blocks(template),
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+        cache_key = self.llm_cache.make_key(
+            data["model"], data["system"], prompt, data["max_tokens"]
+        )
+        fallback_email = template.replace('{{first_name:"there"}}', first_name)
+        return data, cache_key, fallback_email
+
+    def create_message_with_fallback(self, data):
+        """
+        Send a personalization request, retrying on the other model tiers if it fails
 
-Return only the completed email text without explanations.
-"""
+        Args:
+            data (dict): Request params from build_personalization_request()
 
-            # Using Claude API for personalization
-            headers = {
-                "x-api-key": self.claude_api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            }
+        Returns:
+            dict: Decoded response from the first tier that answered
+        """
+        # Only prompts that reach the API count toward the prompt-size histogram
+        self.context_builder.record_prompt(data["messages"][0]["content"])
+        tier = self.router.tier_for_model(data["model"])
+        tiers = self.router.fallback_tiers(tier) if tier else [None]
+        for attempt, tier in enumerate(tiers):
+            params = dict(data, model=self.router.models[tier]) if tier else data
+            started = time.time()
+            try:
+                response_data = self.claude.create_message(params)
+            except Exception as e:
+                if tier:
+                    self.router.record_error(tier)
+                if attempt == len(tiers) - 1:
+                    raise
+                logger.warning(f"{tier} model failed ({e}), trying the next tier")
+                continue
+            self.record_usage(response_data, latency=time.time() - started, tier=tier)
+            return response_data
 
-            data = {
-                "model": "claude-3-sonnet-20240229",
-                "max_tokens": 1000,
-                "system": "You are a helpful assistant that personalizes emails for financial industry professionals.",
-                "messages": [{"role": "user", "content": prompt}],
-            }
+    def personalize_email(self, contact_data, template):
+        """
+        Use Claude to personalize the email based on contact data
 
-            response = requests.post(self.claude_api_url, headers=headers, json=data)
+        Args:
+            contact_data (dict): Contact data from CSV and/or LinkedIn
+            template (str): Email template with placeholders
 
-            if response.status_code == 200:
-                response_data = response.json()
-                personalized_email = response_data["content"][0]["text"].strip()
-            else:
-                logger.error(
-                    f"Claude API Error: {response.status_code} - {response.text}"
-                )
-                raise Exception(f"Claude API Error: {response.status_code}")
+        Returns:
+            str: Personalized email
+        """
+        fallback_email = template
+        try:
+            data, cache_key, fallback_email = self.build_personalization_request(
+                contact_data, template
+            )
+            cached_email = self.llm_cache.get(cache_key)
+            if cached_email:
+                return cached_email
+
+            response_data = self.create_message_with_fallback(data)
+            personalized_email = response_data["content"][0]["text"].strip()
+            if not personalized_email:
+                # Not cached, so the next run asks Claude again
+                logger.warning("Claude returned an empty email, using the template")
+                return fallback_email
+            self.llm_cache.put(cache_key, personalized_email)
             return personalized_email
 
         except Exception as e:
             logger.error(f"Error personalizing email: {e}")
             # Fall back to basic personalization
-            return template.replace('{{first_name:"there"}}', first_name)
+            return fallback_email
+
+    def personalize_many(self, contacts, template):
+        """
+        Personalize several emails concurrently over the pooled Claude client
+
+        Throttled requests are retried by the client, so rate limits slow the
+        run down instead of producing un-personalized emails.
+
+        Args:
+            contacts (list): Contact data dictionaries
+            template (str): Email template with placeholders
+
+        Returns:
+            list: Personalized emails in the same order as contacts
+        """
+        if len(contacts) <= 1 or self.max_concurrency == 1:
+            return [self.personalize_email(contact, template) for contact in contacts]
+
+        # The client's AIMD limiter decides how many of these are actually in flight
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(
+                executor.map(
+                    lambda contact: self.personalize_email(contact, template), contacts
+                )
+            )
+
+    def personalize_segments(self, contacts, template):
+        """
+        Personalize one email per segment of contacts that share their context
+
+        Contacts with the same title, account type, contact type and AUM bucket
+        get one Claude request between them; each contact's first name and
+        company are then substituted into their copy. Contacts without a
+        segment, or whose segment email lost the name token, are personalized
+        one by one.
+
+        Args:
+            contacts (list): Contact data dictionaries
+            template (str): Email template with placeholders
+
+        Returns:
+            list: Personalized emails in the same order as contacts
+        """
+        segments, per_row = group_segments(contacts)
+        members = list(segments.values())
+        segment_emails = self.personalize_many(
+            [segment_contact(contacts[group[0]]) for group in members], template
+        )
+
+        emails = [None] * len(contacts)
+        for group, segment_email in zip(members, segment_emails):
+            for position in group:
+                emails[position] = fill_tokens(segment_email, contacts[position])
+                if emails[position] is None:
+                    per_row.append(position)
+
+        per_row.sort()
+        for position, email in zip(
+            per_row, self.personalize_many([contacts[p] for p in per_row], template)
+        ):
+            emails[position] = email
+
+        self.segment_stats["segments"] += len(members)
+        self.segment_stats["segment_rows"] += len(contacts) - len(per_row)
+        self.segment_stats["per_row"] += len(per_row)
+        return emails
+
+    def get_body_writer(self):
+        """Return the CSV writer for email bodies, creating it on first use"""
+        with self.results_lock:
+            if self.body_writer is None:
+                self.body_writer = BodyCSVWriter(
+                    f"email_bodies_{self.run_stamp}.csv", fields=self.body_fields
+                )
+                logger.info(f"Writing email bodies to {self.body_writer.path}")
+            return self.body_writer
+
+    def build_message(self, to_email, personalized_email, subject=None):
+        """Build the MIME message for one email"""
+        msg = MIMEMultipart()
+        msg["From"] = self.smtp_username
+        msg["To"] = to_email
+        msg["Subject"] = subject or self.subject
+
+        # Attach email body
+        msg.attach(MIMEText(personalized_email, "plain"))
+        return msg
+
+    def get_async_sender(self):
+        """Return the asynchronous SMTP sender, starting it on first use"""
+        if self.async_sender is None:
+            # Imported here so asyncio only loads for --async-send runs
+            from async_sender import AsyncSMTPSender
+
+            self.async_sender = AsyncSMTPSender(
+                self.smtp_server,
+                self.smtp_port,
+                username=self.smtp_username,
+                password=self.smtp_password,
+                connections=self.smtp_connections,
+                rate_limit=self.smtp_rate_limit,
+                starttls=os.getenv("SMTP_STARTTLS", "true").lower()
+                in ("1", "true", "yes"),
+                max_messages_per_connection=int(
+                    os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100")
+                ),
+            ).start()
+        return self.async_sender
+
+    def finish_sending(self, discard=False):
+        """
+        Wait for every queued email to be sent and stop the asynchronous sender
 
-    def send_email(self, to_email, personalized_email, contact_data=None):
+        Args:
+            discard (bool): Drop queued emails instead of sending them
+        """
+        if self.async_sender:
+            self.async_sender.close(discard=discard)
+            self.async_sender = None
+
+    def get_smtp_pool(self):
+        """Return the SMTP connection pool, creating it on first use"""
+        if self.smtp_pool is None:
+            self.smtp_pool = SMTPPool(
+                self.smtp_server,
+                self.smtp_port,
+                username=self.smtp_username,
+                password=self.smtp_password,
+                size=self.send_workers,
+                max_messages_per_connection=int(
+                    os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100")
+                ),
+                starttls=os.getenv("SMTP_STARTTLS", "true").lower()
+                in ("1", "true", "yes"),
+            )
+        return self.smtp_pool
+
+    def send_email(self, to_email, personalized_email, contact_data=None, subject=None):
         """
         Send an email or store it for CSV export
 
@@ -311,6 +671,7 @@ Return only the completed email text without explanations.
             to_email (str): Recipient email
             personalized_email (str): Personalized email content
             contact_data (dict, optional): Contact data for CSV export
+            subject (str, optional): Subject line (default: self.subject)
 
         Returns:
             bool: True if sent/stored successfully, False otherwise
@@ -321,7 +682,7 @@ Return only the completed email text without explanations.
                 # Store the email body along with recipient info
                 email_entry = {
                     "email": to_email,
-                    "subject": self.subject,
+                    "subject": subject or self.subject,
                     "body": personalized_email,
                 }
 
@@ -331,7 +692,7 @@ Return only the completed email text without explanations.
                         if key not in email_entry:
                             email_entry[key] = value
 
-                self.email_bodies.append(email_entry)
+                self.get_body_writer().write(email_entry)
                 logger.info(f"Stored email body for {to_email} (for CSV export)")
                 return True
             except Exception as e:
@@ -345,23 +706,10 @@ Return only the completed email text without explanations.
             return True
 
         try:
-            # Create message
-            msg = MIMEMultipart()
-            msg["From"] = self.smtp_username
-            msg["To"] = to_email
-            msg["Subject"] = self.subject
-
-            # Attach email body
-            msg.attach(MIMEText(personalized_email, "plain"))
+            msg = self.build_message(to_email, personalized_email, subject)
 
-            # Connect to SMTP server
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_username, self.smtp_password)
-
-            # Send email
-            server.send_message(msg)
-            server.quit()
+            # Send over a kept-alive, already authenticated connection
+            self.get_smtp_pool().send_message(msg)
 
             logger.info(f"Email sent to {to_email}")
             return True
@@ -370,64 +718,607 @@ Return only the completed email text without explanations.
             logger.error(f"Error sending email to {to_email}: {e}")
             return False
 
-    def process_csv(self, csv_path, limit=None):
+    def personalize_batch(self, jobs, template, max_batch_size=10000):
         """
-        Process a CSV file of contacts
+        Personalize prepared contacts through the Message Batches API
+
+        Cached emails are returned straight away; everything else is submitted
+        as Message Batches whose results are streamed back as they are read.
 
         Args:
-            csv_path (str): Path to CSV file
-            limit (int, optional): Maximum number of contacts to process
+            jobs (list): Jobs returned by prepare_contact()
+            template (str): Email template with placeholders
+            max_batch_size (int): Maximum number of requests per batch
+
+        Yields:
+            tuple: (job, personalized email) in completion order
         """
-        # Set up LinkedIn scraper if not already done
-        if not self.scraper:
-            if not self.setup_linkedin_scraper():
-                logger.error("Failed to set up LinkedIn scraper. Exiting.")
-                return
+        pending = {}
+        requests_list = []
+        for job in jobs:
+            try:
+                data, cache_key, fallback_email = self.build_personalization_request(
+                    job["contact_data"], template
+                )
+            except Exception as e:
+                logger.error(f"Error building prompt for row {job['index']}: {e}")
+                yield job, template
+                continue
+
+            cached_email = self.llm_cache.get(cache_key)
+            if cached_email:
+                yield job, cached_email
+                continue
+
+            custom_id = f"row-{job['index']}"
+            tier = self.router.tier_for_model(data["model"])
+            pending[custom_id] = (job, cache_key, fallback_email, tier)
+            requests_list.append({"custom_id": custom_id, "params": data})
+            self.context_builder.record_prompt(data["messages"][0]["content"])
 
-        # Load CSV data
         try:
-            # First try with regular encoding
-            try:
-                # Check if this is the specific "Contacts - Sheet1.csv" format with unnamed columns
-                df = pd.read_csv(csv_path)
+            batches = []
+            for start in range(0, len(requests_list), max_batch_size):
+                chunk = requests_list[start : start + max_batch_size]
+                batch = self.claude.create_batch(chunk)
+                logger.info(
+                    f"Submitted Message Batch {batch['id']} with {len(chunk)} requests"
+                )
+                batches.append(batch)
+
+            for batch in batches:
+                batch = self.claude.wait_for_batch(
+                    batch["id"],
+                    poll_interval=self.batch_poll_interval,
+                    on_poll=lambda b: logger.info(
+                        f"Batch {b['id']}: {b.get('processing_status')} "
+                        f"{json.dumps(b.get('request_counts', {}))}"
+                    ),
+                )
+                for entry in self.claude.iter_batch_results(batch):
+                    custom_id = entry.get("custom_id")
+                    if custom_id not in pending:
+                        continue
+                    job, cache_key, fallback_email, tier = pending.pop(custom_id)
+
+                    result = entry.get("result", {})
+                    if result.get("type") == "succeeded":
+                        self.record_usage(result["message"], tier=tier)
+                        personalized_email = result["message"]["content"][0][
+                            "text"
+                        ].strip()
+                        if not personalized_email:
+                            logger.warning(
+                                f"Batch request {custom_id} returned an empty "
+                                "email, using the template"
+                            )
+                            yield job, fallback_email
+                            continue
+                        self.llm_cache.put(cache_key, personalized_email)
+                        yield job, personalized_email
+                    else:
+                        logger.error(
+                            f"Batch request {custom_id} {result.get('type')}: "
+                            f"{result.get('error')}"
+                        )
+                        yield job, fallback_email
+        except Exception as e:
+            logger.error(f"Error running Message Batch: {e}")
 
-                # If first row has column names as values (common in Google Sheets exports)
-                if (
-                    all(col.startswith("Unnamed:") for col in df.columns)
-                    and len(df) > 0
-                ):
-                    logger.info("Detected unnamed columns with headers in first row")
+        # Anything left without a result falls back to basic personalization
+        for job, _, fallback_email, _ in pending.values():
+            yield job, fallback_email
 
-                    # Use the first row as column names
-                    new_columns = df.iloc[0].values
-                    df = df[1:]  # Drop the first row
-                    df.columns = new_columns
-                    df = df.reset_index(drop=True)
+    def prepare_contact(self, i, contact_data):
+        """
+        Enrich a CSV contact and pick the email to use
 
-                    logger.info(f"New columns: {df.columns.tolist()}")
-            except UnicodeDecodeError:
-                # If that fails, try with different encodings
-                df = pd.read_csv(csv_path, encoding="latin1")
+        Args:
+            i (int): Row index, for logging
+            contact_data (Contact): Normalized CSV data from normalize_contacts()
 
-                # Same check for unnamed columns
-                if (
-                    all(col.startswith("Unnamed:") for col in df.columns)
-                    and len(df) > 0
-                ):
-                    logger.info("Detected unnamed columns with headers in first row")
-                    new_columns = df.iloc[0].values
-                    df = df[1:]
-                    df.columns = new_columns
-                    df = df.reset_index(drop=True)
+        Returns:
+            dict: Job with contact_data, email and result details, or None if
+            the row failed (the failure has already been recorded)
+        """
+        job = self.build_contact(i, contact_data)
+        return self.validate_contact(job) if job else None
+
+    def build_contact(self, i, contact_data):
+        """
+        Enrich a CSV contact from LinkedIn/RocketReach
+
+        Args:
+            i (int): Row index, for logging
+            contact_data (Contact): Normalized CSV data from normalize_contacts()
+
+        Returns:
+            dict: Job with index, contact_data and result details, or None if
+            the row failed or was skipped (this has already been recorded)
+        """
+        with self.results_lock:
+            self.results["total"] += 1
+
+        # Get LinkedIn URL if available
+        linkedin_url = contact_data.get("linkedin_url")
+
+        result_details = {
+            "linkedin_url": linkedin_url if linkedin_url else "N/A",
+            "status": "pending",
+            "email_used": None,
+            "notes": "",
+        }
+
+        try:
+            # Skip suppressed recipients and ones already taken by this run
+            # before any scraping or personalization
+            csv_email = contact_data.get("email")
+            if self.skip_suppressed(
+                recipient_keys(csv_email, linkedin_url), result_details, csv_email
+            ):
+                return None
+
+            # Skip contacts the outbox says already got this campaign, before
+            # spending a LinkedIn visit on them
+            if (
+                self.outbox_active
+                and csv_email
+                and self.outbox.is_sent(str(csv_email), self.campaign)
+            ):
+                result_details["email_used"] = str(csv_email)
+                result_details["notes"] += "Already sent (outbox)."
+                self.record_result(result_details, "skipped")
+                return None
+
+            # Get LinkedIn profile data if we have a URL and we're not skipping LinkedIn
+            linkedin_data = None
+            if (
+                self.scraper is not True
+                and "linkedin_url" in contact_data
+                and contact_data["linkedin_url"]
+            ):
+                linkedin_data = self.get_profile_data(contact_data["linkedin_url"])
+
+                # Merge LinkedIn data into contact_data, giving preference to CSV data
+                if linkedin_data:
+                    # Profile fields come under contact data keys, without the
+                    # raw RocketReach payload
+                    if not isinstance(linkedin_data, Profile):
+                        linkedin_data = Profile.from_dict(linkedin_data)
+                    standardized_linkedin = dict(linkedin_data.contact_items())
+
+                    # Add LinkedIn data that's not already in contact_data
+                    for key, value in standardized_linkedin.items():
+                        if key not in contact_data or not contact_data[key]:
+                            contact_data[key] = value
+
+                    # Handle special case for Valid Emails from LinkedIn
+                    if (
+                        "valid_emails" in standardized_linkedin
+                        and standardized_linkedin["valid_emails"]
+                    ):
+                        emails = self.extract_emails_from_list(
+                            standardized_linkedin["valid_emails"]
+                        )
+                        if emails and (
+                            "email" not in contact_data or not contact_data["email"]
+                        ):
+                            contact_data["email"] = emails[0]
+                            result_details["notes"] += "Using email from RocketReach. "
+            elif self.scraper is True:
+                result_details["notes"] += "Skipping LinkedIn scraping as requested. "
+
+            return {
+                "index": i,
+                "contact_data": contact_data,
+                "details": result_details,
+            }
+
+        except Exception as e:
+            result_details["notes"] += f"Error: {str(e)}"
+            self.record_result(result_details, "failed")
+            logger.error(f"Error processing row {i}: {e}")
+            return None
+
+    def skip_suppressed(self, keys, result_details, email=None):
+        """
+        Claim a recipient for this run, or record it as skipped
+
+        The claimed keys are kept in result_details["claimed"] until the row's
+        result is recorded; record_result() gives them back unless the email
+        was sent, so a later duplicate row can still be contacted.
+
+        Args:
+            keys (list): The recipient's suppression keys
+            result_details (dict): The contact's result details
+            email (str, optional): Recipient email, for the results
+
+        Returns:
+            bool: True if the recipient is suppressed or a duplicate and was skipped
+        """
+        if not keys:
+            return False
+        reason = self.suppression.claim(keys)
+        if reason is None:
+            result_details.setdefault("claimed", []).extend(keys)
+            return False
+        if email:
+            result_details["email_used"] = str(email)
+        if reason == "suppressed":
+            result_details["notes"] += "Suppressed (contacted before or bounced)."
+        else:
+            result_details["notes"] += "Duplicate recipient in this run."
+        self.record_result(result_details, "skipped")
+        return True
+
+    def validate_contact(self, job):
+        """
+        Pick the email to use for an enriched contact and check its format
+
+        Args:
+            job (dict): Job returned by build_contact()
+
+        Returns:
+            dict: The job with its email set, or None if no valid email is
+            available (the failure has already been recorded)
+        """
+        contact_data = job["contact_data"]
+        result_details = job["details"]
+        try:
+            # Get email - prioritize the email from CSV mapping
+            email = None
+            if "email" in contact_data and contact_data["email"]:
+                if isinstance(contact_data["email"], list):
+                    if contact_data["email"]:
+                        email = contact_data["email"][0]
+                else:
+                    email = str(contact_data["email"])
+                result_details["notes"] += "Using email from CSV. "
+
+            if not email:
+                result_details["notes"] += "No email available."
+                self.record_result(result_details, "failed")
+                return None
+
+            # Validate the email format
+            if not self.is_valid_email(email):
+                result_details["notes"] += f"Invalid email format: {email}"
+                self.record_result(result_details, "failed")
+                return None
+
+            # The email may have come from RocketReach rather than the CSV
+            keys = recipient_keys(email)
+            if keys[0] not in result_details.get(
+                "claimed", ()
+            ) and self.skip_suppressed(keys, result_details, email):
+                return None
+
+            result_details["email_used"] = email
+            job["email"] = email
+            return job
+
+        except Exception as e:
+            result_details["notes"] += f"Error: {str(e)}"
+            self.record_result(result_details, "failed")
+            logger.error(f"Error processing row {job['index']}: {e}")
+            return None
+
+    def personalize_and_send(self, jobs):
+        """
+        Personalize a window of prepared contacts, then send them
+
+        Emails are personalized concurrently and sent in input order, or, in
+        batch mode, sent as the batch results stream back.
+
+        Args:
+            jobs (list): Jobs returned by prepare_contact()
+        """
+        # Emails found in the outbox or rendered locally skip Claude; jobs
+        # whose email was already delivered are dropped
+        ready_emails = {}
+        remaining = []
+        llm_jobs = []
+        for job in jobs:
+            email, skipped = self.email_without_claude(job)
+            if skipped:
+                continue
+            remaining.append(job)
+            if email is None:
+                llm_jobs.append(job)
+            else:
+                ready_emails[job["index"]] = email
+        jobs = remaining
+
+        if not jobs:
+            return
+
+        if self.batch_personalize:
+            personalized = chain(
+                (
+                    (job, ready_emails[job["index"]])
+                    for job in jobs
+                    if job["index"] in ready_emails
+                ),
+                self.personalize_batch(llm_jobs, self.template),
+            )
+        else:
+            personalize = (
+                self.personalize_segments
+                if self.segment_personalize
+                else self.personalize_many
+            )
+            llm_emails = iter(
+                personalize([job["contact_data"] for job in llm_jobs], self.template)
+            )
+            personalized = (
+                (
+                    job,
+                    ready_emails[job["index"]]
+                    if job["index"] in ready_emails
+                    else next(llm_emails),
+                )
+                for job in jobs
+            )
+
+        for job, personalized_email in personalized:
+            self.deliver(
+                job["details"], job["email"], personalized_email, job["contact_data"]
+            )
+
+    def email_without_claude(self, job):
+        """
+        Find a job's email without calling Claude
+
+        Emails already in the outbox are not personalized again (and are not
+        sent again if they were delivered); with local rendering, rows with the
+        structured data the template needs are rendered locally.
+
+        Args:
+            job (dict): Job returned by prepare_contact()
+
+        Returns:
+            tuple: (email, or None if Claude must personalize it; True if the
+            job was skipped because its email was already sent)
+        """
+        if self.outbox_active:
+            message = self.outbox.get(job["email"], self.campaign)
+            if message is not None and message["status"] == "sent":
+                job["details"]["notes"] += "Already sent (outbox)."
+                self.record_result(job["details"], "skipped")
+                return None, True
+            if message is not None and message["body"]:
+                job["details"]["notes"] += "Resumed from outbox. "
+                return message["body"], False
+
+        if self.local_render:
+            email = self.local_renderer.render(job["contact_data"])
+            if email is not None:
+                return email, False
+            with self.results_lock:
+                self.llm_rendered += 1
+        return None, False
+
+    def run_pipeline(self, rows):
+        """
+        Process rows through concurrent enrichment, validation, personalization
+        and sending stages connected by bounded queues
+
+        LinkedIn visits are throttled in get_profile_data() and Claude by its
+        client; synchronous sends are limited to smtp_rate_limit by the send
+        stage (the asynchronous sender applies it itself). Emails reach the
+        send stage in input order.
+
+        Args:
+            rows (iterable): (index, contact data) pairs from normalize_contacts()
+        """
+
+        def enrich(item):
+            return self.build_contact(*item)
+
+        def personalize(job):
+            email, skipped = self.email_without_claude(job)
+            if skipped:
+                return None
+            if email is None:
+                email = self.personalize_email(job["contact_data"], self.template)
+            return job, email
+
+        def send(item):
+            job, email = item
+            self.deliver(job["details"], job["email"], email, job["contact_data"])
+
+        smtp_sends = not (self.async_send or self.body_to_csv or self.test_mode)
+        self.pipeline = Pipeline(
+            [
+                Stage("enrich", enrich, workers=self.enrich_workers),
+                Stage("validate", self.validate_contact),
+                Stage("personalize", personalize, workers=self.max_concurrency),
+                Stage(
+                    "send",
+                    send,
+                    workers=self.send_workers,
+                    rate_limit=self.smtp_rate_limit if smtp_sends else None,
+                    # Emails go out (and into the body CSV) in input order
+                    ordered=True,
+                ),
+            ],
+            queue_size=self.max_concurrency * 4,
+        )
+        self.pipeline.run(rows)
+
+    def deliver(
+        self,
+        result_details,
+        to_email,
+        personalized_email,
+        contact_data=None,
+        subject=None,
+    ):
+        """
+        Send one personalized email (or store it for CSV export) and record the result
+
+        With an outbox, the email is stored there before sending and marked as
+        delivered or failed afterwards, so a re-run neither personalizes nor
+        sends it again.
+
+        Args:
+            result_details (dict): The contact's result details
+            to_email (str): Recipient email
+            personalized_email (str): Personalized email content
+            contact_data (dict, optional): Contact data for CSV export
+            subject (str, optional): Subject line (default: self.subject)
+        """
+        outbox_key = None
+        if self.outbox_active:
+            outbox_key = self.outbox.enqueue(
+                to_email, self.campaign, subject or self.subject, personalized_email
+            )
+
+        try:
+            if self.async_send and not (self.body_to_csv or self.test_mode):
+                # Hand the message to the SMTP workers; the result is
+                # recorded by the callback once it has been sent
+                self.get_async_sender().submit(
+                    self.build_message(to_email, personalized_email, subject),
+                    callback=partial(
+                        self.record_async_result, result_details, outbox_key
+                    ),
+                )
+                return
+
+            # Send the email or store for CSV export
+            if self.send_email(to_email, personalized_email, contact_data, subject):
+                status = "stored" if self.body_to_csv else "sent"
+            else:
+                status = "failed"
+                if self.body_to_csv:
+                    result_details["notes"] += "Failed to store email body."
+                else:
+                    result_details["notes"] += "Failed to send email."
+
+        except Exception as e:
+            status = "failed"
+            result_details["notes"] += f"Error: {str(e)}"
+            logger.error(f"Error delivering email to {to_email}: {e}")
+
+        self.record_delivery(result_details, status, outbox_key)
+
+    def record_delivery(self, result_details, status, outbox_key=None):
+        """Mark a delivery attempt in the outbox, then record it in the results"""
+        if outbox_key:
+            if status == "failed":
+                self.outbox.mark_failed(outbox_key, result_details["notes"])
+            else:
+                self.outbox.mark_sent(outbox_key)
+        if status == "sent" and not self.test_mode:
+            # Contacted recipients are suppressed in later campaigns
+            linkedin_url = result_details.get("linkedin_url")
+            self.suppression.add(
+                recipient_keys(
+                    result_details["email_used"],
+                    linkedin_url if linkedin_url != "N/A" else None,
+                )
+            )
+        self.record_result(result_details, status)
+
+    def record_result(self, result_details, status):
+        """
+        Record a contact's final status in the results
+
+        Called from the SMTP sender's thread as well, so results are updated under a lock
+
+        Args:
+            result_details (dict): The contact's result details
+            status (str): "sent", "stored", "skipped" or "failed"
+        """
+        claimed = result_details.pop("claimed", None)
+        if claimed and status in ("failed", "skipped"):
+            self.suppression.release(claimed)
+        with self.results_lock:
+            result_details["status"] = status
+            if status == "failed":
+                self.results["failed"] += 1
+            elif status == "skipped":
+                self.results["skipped"] += 1
+            else:
+                self.results["sent"] += 1
+            if self.ledger is None:
+                self.ledger = RunLedger(self.ledger_path)
+            self.ledger.write(result_details)
+
+    def record_async_result(self, result_details, outbox_key, success, error):
+        """Send callback for the asynchronous SMTP sender"""
+        if success:
+            logger.info(f"Email sent to {result_details['email_used']}")
+            self.record_delivery(result_details, "sent", outbox_key)
+        else:
+            logger.error(
+                f"Error sending email to {result_details['email_used']}: {error}"
+            )
+            result_details["notes"] += f"Failed to send email: {error}"
+            self.record_delivery(result_details, "failed", outbox_key)
+
+    @property
+    def outbox_active(self):
+        """Whether emails go through the outbox (only when really sending)"""
+        return self.outbox is not None and not (self.test_mode or self.body_to_csv)
+
+    def drain_outbox(self):
+        """Send every email left pending or failed in the outbox for this campaign"""
+        messages = self.outbox.pending(self.campaign)
+        logger.info(
+            f"Draining {len(messages)} emails from the outbox for campaign {self.campaign!r}"
+        )
+        for message in messages:
+            with self.results_lock:
+                self.results["total"] += 1
+            result_details = {
+                "linkedin_url": "N/A",
+                "status": "pending",
+                "email_used": message["recipient"],
+                "notes": "From outbox. ",
+            }
+            # The recipient may have been suppressed since the email was queued
+            if self.skip_suppressed(
+                recipient_keys(message["recipient"]),
+                result_details,
+                message["recipient"],
+            ):
+                continue
+            self.deliver(
+                result_details,
+                message["recipient"],
+                message["body"],
+                subject=message["subject"],
+            )
+        self.finish_sending()
+
+    def process_csv(self, csv_path, limit=None):
+        """
+        Process a CSV file of contacts
+
+        Args:
+            csv_path (str): Path to CSV file
+            limit (int, optional): Maximum number of contacts to process
+        """
+        import pandas as pd
+
+        # Open the CSV; rows are read in chunks as processing goes
+        try:
+            reader = ContactCSVReader(csv_path)
+            columns = reader.columns
+            logger.info(f"Reading {csv_path} (encoding: {reader.encoding})")
+            if reader.header_row:
+                logger.info(f"New columns: {columns}")
 
             # Map columns to standardized names
-            column_map = self.map_columns(df)
+            column_map = self.map_columns(reader.header())
 
             # For "Contacts - Sheet1.csv" format, manually map the columns if automatic mapping fails
             if (
-                "Name" in df.columns
-                and "LinkedIn IDs" in df.columns
-                and "Email ID" in df.columns
+                "Name" in columns
+                and "LinkedIn IDs" in columns
+                and "Email ID" in columns
             ):
                 logger.info(
                     "Detected 'Contacts - Sheet1.csv' format, using direct column mapping"
@@ -443,156 +1334,50 @@ Return only the completed email text without explanations.
             # Check if the required LinkedIn URL or email column exists
             if "linkedin_url" not in column_map and "email" not in column_map:
                 logger.error(
-                    f"CSV must have a column for LinkedIn URLs or emails. Available columns: {df.columns.tolist()}"
+                    f"CSV must have a column for LinkedIn URLs or emails. Available columns: {columns}"
                 )
                 logger.error(
                     "Please rename one of these columns or provide a CSV with LinkedIn URL data."
                 )
                 return
 
-            linkedin_col = column_map.get("linkedin_url")
-            email_col = column_map.get("email")
-            logger.info(f"Loaded {len(df)} contacts from {csv_path}")
-
-            # Process each row (with optional limit)
-            max_contacts = min(len(df), limit) if limit else len(df)
-            logger.info(f"Processing {max_contacts} contacts (out of {len(df)} total)")
-
-            for i, row in df.iloc[:max_contacts].iterrows():
-                self.results["total"] += 1
-
-                # Get LinkedIn URL if available
-                linkedin_url = None
-                if linkedin_col and linkedin_col in row and pd.notna(row[linkedin_col]):
-                    linkedin_url = row[linkedin_col]
-
-                result_details = {
-                    "linkedin_url": linkedin_url if linkedin_url else "N/A",
-                    "status": "pending",
-                    "email_used": None,
-                    "notes": "",
-                }
-
-                try:
-                    # Create a normalized contact data dictionary
-                    contact_data = {}
-
-                    # Extract data from CSV row using our column mapping
-                    for standard_field, csv_field in column_map.items():
-                        if csv_field in row and pd.notna(row[csv_field]):
-                            contact_data[standard_field] = row[csv_field]
-
-                    # Add any unmapped columns that might be useful
-                    for col in df.columns:
-                        if pd.notna(row[col]) and col not in column_map.values():
-                            # Convert to lowercase with underscores for consistency
-                            field_name = col.lower().replace(" ", "_")
-                            contact_data[field_name] = row[col]
-
-                    # Get LinkedIn profile data if we have a URL and we're not skipping LinkedIn
-                    linkedin_data = None
-                    if (
-                        self.scraper
-                        and self.scraper is not True
-                        and "linkedin_url" in contact_data
-                        and contact_data["linkedin_url"]
-                    ):
-                        linkedin_data = self.get_profile_data(
-                            contact_data["linkedin_url"]
-                        )
-
-                        # Merge LinkedIn data into contact_data, giving preference to CSV data
-                        if linkedin_data:
-                            # Standardize LinkedIn data keys
-                            standardized_linkedin = {}
-                            for key, value in linkedin_data.items():
-                                # Convert to lowercase with underscores for consistency
-                                std_key = key.lower().replace(" ", "_")
-                                standardized_linkedin[std_key] = value
-
-                            # Add LinkedIn data that's not already in contact_data
-                            for key, value in standardized_linkedin.items():
-                                if key not in contact_data or not contact_data[key]:
-                                    contact_data[key] = value
-
-                            # Handle special case for Valid Emails from LinkedIn
-                            if (
-                                "valid_emails" in standardized_linkedin
-                                and standardized_linkedin["valid_emails"]
-                            ):
-                                emails = self.extract_emails_from_list(
-                                    standardized_linkedin["valid_emails"]
-                                )
-                                if emails and (
-                                    "email" not in contact_data
-                                    or not contact_data["email"]
-                                ):
-                                    contact_data["email"] = emails[0]
-                                    result_details["notes"] += (
-                                        "Using email from RocketReach. "
-                                    )
-                    elif self.scraper is True:
-                        result_details["notes"] += (
-                            "Skipping LinkedIn scraping as requested. "
-                        )
-
-                    # Get email - prioritize the email from CSV mapping
-                    email = None
-                    if "email" in contact_data and contact_data["email"]:
-                        if isinstance(contact_data["email"], list):
-                            if contact_data["email"]:
-                                email = contact_data["email"][0]
-                        else:
-                            email = str(contact_data["email"])
-                        result_details["notes"] += "Using email from CSV. "
-
-                    if not email:
-                        result_details["status"] = "failed"
-                        result_details["notes"] += "No email available."
-                        self.results["failed"] += 1
-                        self.results["details"].append(result_details)
-                        continue
-
-                    # Validate the email format
-                    if not self.is_valid_email(email):
-                        result_details["status"] = "failed"
-                        result_details["notes"] += f"Invalid email format: {email}"
-                        self.results["failed"] += 1
-                        self.results["details"].append(result_details)
-                        continue
-
-                    result_details["email_used"] = email
-
-                    # Personalize the email
-                    personalized_email = self.personalize_email(
-                        contact_data, self.template
-                    )
-
-                    # Send the email or store for CSV export
-                    if self.send_email(email, personalized_email, contact_data):
-                        if self.body_to_csv:
-                            result_details["status"] = "stored"
-                        else:
-                            result_details["status"] = "sent"
-                        self.results["sent"] += 1
-                    else:
-                        result_details["status"] = "failed"
-                        if self.body_to_csv:
-                            result_details["notes"] += "Failed to store email body."
-                        else:
-                            result_details["notes"] += "Failed to send email."
-                        self.results["failed"] += 1
-
-                except Exception as e:
-                    result_details["status"] = "failed"
-                    result_details["notes"] += f"Error: {str(e)}"
-                    self.results["failed"] += 1
-                    logger.error(f"Error processing row {i}: {e}")
-
-                self.results["details"].append(result_details)
+            if limit:
+                logger.info(f"Processing up to {limit} contacts")
+
+            # Body CSV columns are fixed up front rather than by whichever row
+            # finishes first: the email, then the standardized and CSV fields,
+            # then the fields LinkedIn enrichment adds
+            self.body_fields = list(
+                dict.fromkeys(
+                    ["email", "subject", "body"]
+                    + [key for _, key in Contact.FIELDS]
+                    + contact_fields(columns, column_map)
+                    + [
+                        attribute
+                        for attribute, _ in Profile.FIELDS
+                        if attribute not in Profile.STORAGE
+                    ]
+                )
+            )
 
-                # Pause between profiles to avoid rate limiting
-                time.sleep(3)
+            # Contact dictionaries are built column-wise, one chunk at a time
+            rows = (
+                row
+                for chunk in reader.chunks(limit)
+                for row in zip(chunk.index, normalize_contacts(chunk, column_map))
+            )
+            # Reading stops once the run is aborted
+            rows = takewhile(lambda row: not self.aborted, rows)
+            if self.batch_personalize or self.segment_personalize:
+                # Batch and segment modes need every row before personalizing
+                jobs = [
+                    self.prepare_contact(i, contact_data) for i, contact_data in rows
+                ]
+                if not self.aborted:
+                    self.personalize_and_send([job for job in jobs if job])
+            else:
+                self.run_pipeline(rows)
+            self.finish_sending()
 
         except pd.errors.EmptyDataError:
             logger.error(f"Error: The file {csv_path} is empty")
@@ -603,6 +1388,31 @@ Return only the completed email text without explanations.
         except Exception as e:
             logger.error(f"Error processing CSV: {e}")
 
+    def linkedin_report(self):
+        """Describe how LinkedIn was used in this run"""
+        if self.linkedin_failed and self.linkedin_fallback:
+            return "set up failed, continued with CSV data only (--continue-without-linkedin)"
+        if self.linkedin_failed:
+            return "set up failed, run stopped"
+        if self.scraper is True:
+            return "skipped"
+        return "used" if self.scraper else "not needed"
+
+    def render_split_report(self):
+        """Summarize how many emails were rendered locally versus by Claude"""
+        if not self.local_render:
+            return "Local rendering: off"
+
+        local = self.local_renderer.stats["local"]
+        total = local + self.llm_rendered
+        share = local / total * 100 if total else 0.0
+        return (
+            f"Local rendering: {local} local, {self.llm_rendered} via Claude "
+            f"({share:.2f}% local; escalated for missing fields: "
+            f"{self.local_renderer.stats['missing_fields']}, flagged: "
+            f"{self.local_renderer.stats['flagged']})"
+        )
+
     def generate_report(self):
         """Generate a report of the email sending results"""
         mode = "TEST MODE" if self.test_mode else "LIVE MODE"
@@ -620,54 +1430,78 @@ SUMMARY
 Total contacts: {self.results["total"]}
 Emails {"stored" if self.body_to_csv else "sent"}: {self.results["sent"]}
 Failed: {self.results["failed"]}
+Skipped (already sent, suppressed or duplicate): {self.results["skipped"]}
+Suppression index: {len(self.suppression)} recipients ({self.suppression.stats["suppressed"]} suppressed, {self.suppression.stats["duplicates"]} duplicates in this run, {self.suppression.stats["added"]} added)
 Success rate: {self.results["sent"] / self.results["total"] * 100 if self.results["total"] > 0 else 0:.2f}%
+LLM cache hit rate: {self.llm_cache.hit_rate():.2f}% ({self.llm_cache.stats["hits"]} hits, {self.llm_cache.stats["misses"]} misses)
+Claude requests: {self.usage["requests"]} (input tokens: {self.usage["input_tokens"]}, output tokens: {self.usage["output_tokens"]}, prompt cache writes: {self.usage["cache_creation_input_tokens"]}, prompt cache reads: {self.usage["cache_read_input_tokens"]})
+Claude tiers:
+{self.router.report()}
+Claude retries: {self.claude.stats["retries"]} ({self.claude.stats["throttled"]} throttled), final concurrency limit: {int(self.claude.limiter.limit)}
+{self.render_split_report()}
+LinkedIn scraper: {self.linkedin_report()}
+LinkedIn profiles: {self.profile_store.report() if self.profile_store else "No profile store"}
+Segments: {self.segment_stats["segments"]} Claude requests covering {self.segment_stats["segment_rows"]} rows, {self.segment_stats["per_row"]} rows personalized individually
+PIPELINE
+--------
+{self.pipeline.report() if self.pipeline else "Not used"}
+
+PROMPT TOKENS
+-------------
+{self.context_builder.histogram_report()}
 
-DETAILS
--------
 """
-        for detail in self.results["details"]:
-            report += f"LinkedIn: {detail['linkedin_url']}\n"
-            report += f"Status: {detail['status']}\n"
-            report += f"Email: {detail['email_used']}\n"
-            report += f"Notes: {detail['notes']}\n"
-            report += "----------------\n"
-
-        # Save report to file
+
+        # Save report to file, copying the details from the ledger one
+        # record at a time rather than holding them in memory
         report_path = f"email_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         with open(report_path, "w") as f:
             f.write(report)
-
-        # If we're storing email bodies, save them to CSV
-        if self.body_to_csv and self.email_bodies:
-            try:
-                csv_path = (
-                    f"email_bodies_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            f.write("DETAILS\n-------\n")
+            for detail in self.ledger or ():
+                f.write(
+                    f"LinkedIn: {detail['linkedin_url']}\n"
+                    f"Status: {detail['status']}\n"
+                    f"Email: {detail['email_used']}\n"
+                    f"Notes: {detail['notes']}\n"
+                    "----------------\n"
                 )
 
-                # Create a modified DataFrame to handle newlines properly
-                modified_bodies = []
-                for entry in self.email_bodies:
-                    # Create a new entry for each email to avoid modifying the original
-                    new_entry = entry.copy()
-
-                    # HTML encode the newlines so they render properly when viewed
-                    if "body" in new_entry and new_entry["body"]:
-                        new_entry["body"] = new_entry["body"].replace("\n", "<br>")
-
-                    modified_bodies.append(new_entry)
-
-                df = pd.DataFrame(modified_bodies)
-                df.to_csv(csv_path, index=False)
-                logger.info(f"Email bodies saved to {csv_path} with HTML line breaks")
-            except Exception as e:
-                logger.error(f"Error saving email bodies to CSV: {e}")
-
+        if self.body_writer:
+            logger.info(
+                f"{self.body_writer.rows} email bodies saved to "
+                f"{self.body_writer.path} with HTML line breaks"
+            )
+        if self.ledger:
+            logger.info(f"Per-contact results saved to {self.ledger_path}")
         logger.info(f"Report saved to {report_path}")
         return report
 
-    def cleanup(self):
-        """Clean up resources"""
-        if self.scraper:
+    def cleanup(self, interrupted=False):
+        """
+        Clean up resources
+
+        Args:
+            interrupted (bool): The run was interrupted, so emails still queued
+                for sending are dropped (an outbox keeps them for a later run)
+        """
+        # Workers still running after an interrupt use everything below
+        if self.pipeline:
+            self.pipeline.stop(wait=True)
+        self.finish_sending(discard=interrupted)
+        self.claude.close()
+        self.llm_cache.close()
+        if self.outbox:
+            self.outbox.close()
+            self.outbox = None
+        self.suppression.save()
+        if self.ledger:
+            self.ledger.close()
+        if self.body_writer:
+            self.body_writer.close()
+        if self.smtp_pool:
+            self.smtp_pool.close()
+        if self.scraper and self.scraper is not True:
             self.scraper.close()
             logger.info("LinkedIn scraper closed")
 
@@ -677,7 +1511,9 @@ def main():
         description="Send personalized emails based on LinkedIn profiles"
     )
     parser.add_argument(
-        "csv_file", help="Path to CSV file with LinkedIn URLs and optional emails"
+        "csv_file",
+        nargs="?",
+        help="Path to CSV file with LinkedIn URLs and optional emails",
     )
     parser.add_argument(
         "--subject", default="Connecting from 535West", help="Email subject line"
@@ -693,6 +1529,29 @@ def main():
         action="store_true",
         help="Skip LinkedIn scraping and just use CSV data",
     )
+    parser.add_argument(
+        "--continue-without-linkedin",
+        action="store_true",
+        help="If the LinkedIn scraper can't be set up, send from CSV data only "
+        "instead of stopping the run",
+    )
+    parser.add_argument(
+        "--profile-store",
+        default="linkedin_profiles_store.jsonl",
+        help="JSONL file of scraped LinkedIn profiles to reuse and add to; profiles "
+        "in linkedin_profiles_*.csv are reused too (default: linkedin_profiles_store.jsonl)",
+    )
+    parser.add_argument(
+        "--profile-max-age-days",
+        type=float,
+        default=30,
+        help="Scrape stored profiles again once they are older than this (default: 30)",
+    )
+    parser.add_argument(
+        "--no-profile-store",
+        action="store_true",
+        help="Always visit LinkedIn instead of reusing scraped profiles",
+    )
     parser.add_argument(
         "--limit",
         type=int,
@@ -704,34 +1563,178 @@ def main():
         action="store_true",
         help="Save personalized email bodies to a CSV instead of sending emails",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of emails to personalize with Claude at the same time to start with",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Upper bound for the concurrency as it adapts to rate limits (default: 4x --concurrency)",
+    )
+    parser.add_argument(
+        "--enrich-workers",
+        type=int,
+        default=int(os.getenv("RR_BROWSER_SESSIONS", 1)),
+        help="Threads preparing rows; LinkedIn visits stay one at a time while "
+        "RocketReach lookups run in parallel (default: RR_BROWSER_SESSIONS or 1)",
+    )
+    parser.add_argument(
+        "--send-workers",
+        type=int,
+        default=1,
+        help="Threads sending emails over pooled SMTP connections (default: 1)",
+    )
+    parser.add_argument(
+        "--outbox",
+        default=None,
+        help="SQLite outbox that records sent emails, so re-runs skip them and resume "
+        "pending ones (e.g. outbox.sqlite3)",
+    )
+    parser.add_argument(
+        "--ledger",
+        default=None,
+        help="JSONL file each contact's result is written to as it completes; "
+        "an existing file is replaced (default: email_ledger_<timestamp>.jsonl)",
+    )
+    parser.add_argument(
+        "--suppression-index",
+        default=None,
+        help="File of recipients never to email again; contacted recipients are "
+        "added to it (e.g. suppression.idx)",
+    )
+    parser.add_argument(
+        "--suppress",
+        action="append",
+        default=[],
+        help="Text file of email addresses or LinkedIn URLs (one per line) to add to "
+        "the suppression index, e.g. bounces or unsubscribes (repeatable)",
+    )
+    parser.add_argument(
+        "--campaign",
+        default=None,
+        help="Campaign name for outbox de-duplication (default: the subject line)",
+    )
+    parser.add_argument(
+        "--drain-outbox",
+        action="store_true",
+        help="Only send the pending and failed emails in the outbox, then exit",
+    )
+    parser.add_argument(
+        "--async-send",
+        action="store_true",
+        help="Send emails from background SMTP workers while personalization continues "
+        "(requires aiosmtplib)",
+    )
+    parser.add_argument(
+        "--smtp-connections",
+        type=int,
+        default=4,
+        help="Concurrent SMTP connections with --async-send (default: 4)",
+    )
+    parser.add_argument(
+        "--smtp-rate-limit",
+        type=float,
+        default=None,
+        help="Most emails per second sent to the SMTP server",
+    )
+    parser.add_argument(
+        "--local-render",
+        action="store_true",
+        help="Fill the template from CSV fields and only ask Claude for rows missing them "
+        "or flagged in a rich_personalization column",
+    )
+    parser.add_argument(
+        "--segment-personalize",
+        action="store_true",
+        help="Generate one email per group of contacts sharing title, account type, "
+        "contact type and AUM bucket, then fill in each first name and company",
+    )
+    parser.add_argument(
+        "--model-tier",
+        choices=["auto", "fast", "standard"],
+        default="auto",
+        help="Model for personalization: auto sends data-light contacts to the fast "
+        "model and rich profiles to the standard one (default: auto)",
+    )
+    parser.add_argument(
+        "--prompt-token-budget",
+        type=int,
+        default=300,
+        help="Most estimated tokens of contact context to include in each Claude prompt",
+    )
+    parser.add_argument(
+        "--batch-personalize",
+        action="store_true",
+        help="Personalize all emails in one Message Batch instead of one request each",
+    )
+    parser.add_argument(
+        "--batch-poll-interval",
+        type=float,
+        default=30,
+        help="Seconds between Message Batch status checks",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        default="llm_cache.sqlite3",
+        help="File caching personalized emails between runs",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Always call Claude and don't store its responses",
+    )
+    parser.add_argument(
+        "--clear-llm-cache",
+        action="store_true",
+        help="Discard all cached personalized emails before running",
+    )
     args = parser.parse_args()
 
+    # Configure logging (the log file is only created once something is logged)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("emailing.log", delay=True),
+            logging.StreamHandler(),
+        ],
+    )
+    if not args.csv_file and not args.drain_outbox:
+        parser.error("csv_file is required unless --drain-outbox is given")
+    if args.async_send and not (args.body_to_csv or args.test):
+        # Checked up front: without it every row would fail at delivery
+        from importlib.util import find_spec
+
+        if find_spec("aiosmtplib") is None:
+            parser.error("--async-send requires aiosmtplib (pip install aiosmtplib)")
+    if args.segment_personalize and args.batch_personalize:
+        parser.error("--segment-personalize and --batch-personalize can't be combined")
+
     # If show-columns flag is set, just display the CSV columns and exit
     if args.show_columns:
         try:
-            # First load the raw CSV
-            df = pd.read_csv(args.csv_file)
+            # Only the header and first row are read, however large the file
+            reader = ContactCSVReader(args.csv_file)
             print(f"\nRaw columns found in {args.csv_file}:")
-            for i, col in enumerate(df.columns):
+            for i, col in enumerate(reader.raw_columns):
                 print(f"{i + 1}. {col}")
 
             # Check if this is a CSV with unnamed columns and headers in first row
-            if all(col.startswith("Unnamed:") for col in df.columns) and len(df) > 0:
+            if reader.header_row:
                 print("\nDetected unnamed columns with headers in first row")
-                new_columns = df.iloc[0].values
-                df = df[1:]  # Drop the first row
-                df.columns = new_columns
-                df = df.reset_index(drop=True)
-
                 print("\nActual columns (from first row):")
-                for i, col in enumerate(df.columns):
+                for i, col in enumerate(reader.columns):
                     print(f"{i + 1}. {col}")
 
             print("\nSample data (first row):")
-            for col in df.columns:
-                if len(df) > 0:  # Make sure we have at least one row
-                    value = df.iloc[0][col]
-                    print(f"{col}: {value}")
+            row = reader.first_row()
+            if row is not None:  # Make sure we have at least one row
+                for col in reader.columns:
+                    print(f"{col}: {row[col]}")
 
             return
         except Exception as e:
@@ -751,22 +1754,70 @@ Best,
 Rahil"""
 
     try:
-        processor = EmailProcessor(template, args.subject, args.test)
+        llm_cache = ResponseCache(args.llm_cache, enabled=not args.no_llm_cache)
+        if args.clear_llm_cache:
+            llm_cache.clear()
+            logger.info(f"Cleared LLM response cache {args.llm_cache}")
+
+        processor = EmailProcessor(
+            template,
+            args.subject,
+            args.test,
+            concurrency=args.concurrency,
+            llm_cache=llm_cache,
+            max_concurrency=args.max_concurrency,
+            prompt_token_budget=args.prompt_token_budget,
+            model_tier=args.model_tier,
+        )
 
         # Only set up LinkedIn scraper if not skipping LinkedIn
         if args.skip_linkedin:
             logger.info("Skipping LinkedIn scraping as requested")
             processor.scraper = True  # Set a dummy value so setup isn't attempted
+        elif not args.no_profile_store:
+            processor.profile_store = ProfileStore(
+                args.profile_store, max_age_days=args.profile_max_age_days
+            )
 
         # Add parameter to store body-to-csv option
         processor.body_to_csv = args.body_to_csv
+        processor.linkedin_fallback = args.continue_without_linkedin
+        if args.ledger:
+            processor.ledger_path = args.ledger
+        processor.batch_personalize = args.batch_personalize
+        processor.batch_poll_interval = args.batch_poll_interval
+        processor.local_render = args.local_render
+        processor.segment_personalize = args.segment_personalize
+        processor.async_send = args.async_send
+        processor.enrich_workers = args.enrich_workers
+        processor.send_workers = args.send_workers
+        processor.smtp_connections = args.smtp_connections
+        processor.smtp_rate_limit = args.smtp_rate_limit
+        if args.suppression_index or args.suppress:
+            processor.suppression = SuppressionIndex(
+                args.suppression_index or "suppression.idx"
+            )
+            for path in args.suppress:
+                count = processor.suppression.import_file(path)
+                logger.info(f"Suppressed {count} recipients from {path}")
+        if args.outbox or args.drain_outbox:
+            processor.outbox = Outbox(args.outbox or "outbox.sqlite3")
+            processor.campaign = args.campaign or args.subject
+
+        if args.drain_outbox:
+            processor.drain_outbox()
+            processor.generate_report()
+            processor.cleanup()
+            print(
+                f"\nOutbox drained: {processor.results['sent']} sent, "
+                f"{processor.results['failed']} failed"
+            )
+            return
 
         processor.process_csv(args.csv_file, limit=args.limit)
         report = processor.generate_report()
 
-        # Only need to cleanup if we actually initialized the scraper
-        if not args.skip_linkedin:
-            processor.cleanup()
+        processor.cleanup()
 
         if processor.body_to_csv:
             print("\nEmail Processing Complete!")
@@ -776,11 +1827,17 @@ Rahil"""
             print("\nEmail Sending Complete!")
             print(f"Sent: {processor.results['sent']}")
             print(f"Failed: {processor.results['failed']}")
+        print(
+            f"LLM cache hit rate: {processor.llm_cache.hit_rate():.2f}% "
+            f"({processor.llm_cache.stats['hits']} hits)"
+        )
+        if processor.linkedin_failed:
+            print(f"LinkedIn scraper: {processor.linkedin_report()}")
 
     except KeyboardInterrupt:
         print("\nProcess interrupted by user. Cleaning up...")
         if "processor" in locals():
-            processor.cleanup()
+            processor.cleanup(interrupted=True)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         if "processor" in locals():
@@ -0,0 +1,494 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from records import EnrichmentResult
+
+# Every backend returns results in this shape so callers never need to know
+# whether the data came from the API, the browser or the local cache.
+RESULT_FIELDS = (
+    "source",
+    "linkedin_url",
+    "name",
+    "emails",
+    "current_role",
+    "current_employer",
+    "raw",
+)
+
+
+def make_result(
+    source,
+    linkedin_url,
+    name=None,
+    emails=None,
+    current_role=None,
+    current_employer=None,
+    raw=None,
+):
+    """
+    Build an enrichment result in the shared schema.
+
+    Args:
+        source: Name of the backend that produced the result ("api", "browser", "cache")
+        linkedin_url: The LinkedIn profile URL that was looked up
+        name: Full name of the person, if known
+        emails: List of {"email": ..., "smtp_valid": ...} dicts
+        current_role: Current job title
+        current_employer: Current employer name
+        raw: The unmodified payload returned by the backend
+
+    Returns:
+        EnrichmentResult, read like a dict with one key per entry in RESULT_FIELDS
+    """
+    return EnrichmentResult(
+        source=source,
+        linkedin_url=linkedin_url,
+        name=name,
+        emails=emails or [],
+        current_role=current_role or "N/A",
+        current_employer=current_employer or "N/A",
+        raw=raw,
+    )
+
+
+def canonical_linkedin_url(url):
+    """
+    Normalize a LinkedIn profile URL so the same person always maps to one key.
+
+    Args:
+        url: A LinkedIn profile URL in any of its common forms
+
+    Returns:
+        The URL as https://www.linkedin.com/in/<slug>, or the stripped input if
+        it does not look like a profile URL
+    """
+    if not url:
+        return url
+
+    url = str(url).strip()
+    marker = "linkedin.com/in/"
+    position = url.lower().find(marker)
+    if position == -1:
+        return url
+
+    slug = url[position + len(marker) :]
+    slug = slug.split("?")[0].split("#")[0].strip("/").split("/")[0]
+    return f"https://www.linkedin.com/in/{slug.lower()}"
+
+
+class CreditsExhausted(Exception):
+    """Raised by a backend when its lookup credits have run out."""
+
+
+class EnrichmentProvider:
+    """Interface shared by every enrichment backend."""
+
+    name = "base"
+
+    def lookup(self, linkedin_url, name=None):
+        """
+        Look up a LinkedIn profile.
+
+        Args:
+            linkedin_url: The LinkedIn profile URL
+            name: The person's name, used by backends that can search by name
+
+        Returns:
+            Result dictionary built with make_result(), or None if nothing was found
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class RocketReachAPIProvider(EnrichmentProvider):
+    """Look up profiles through the RocketReach API."""
+
+    name = "api"
+
+    def __init__(self, client):
+        self.client = client
+
+    def lookup(self, linkedin_url, name=None):
+        try:
+            lookup_result = self.client.person.lookup(linkedin_url=linkedin_url)
+        except Exception as e:
+            if "credits" in str(e).lower():
+                raise CreditsExhausted(str(e))
+            raise
+
+        if hasattr(lookup_result, "person") and lookup_result.person:
+            print(f"RocketReach lookup successful for {linkedin_url}")
+            return self._to_result(linkedin_url, lookup_result.person.to_dict())
+
+        print(f"No RocketReach data found for {linkedin_url}")
+        if (
+            hasattr(lookup_result, "error")
+            and "credits" in str(lookup_result.error).lower()
+        ):
+            raise CreditsExhausted(str(lookup_result.error))
+
+        # Try an alternative approach - lookup by name if available
+        if name and name != "N/A":
+            print(f"Trying to look up by name: {name}")
+            try:
+                name_lookup = self.client.person.search(name=name, limit=1)
+            except Exception as e:
+                if "credits" in str(e).lower():
+                    raise CreditsExhausted(str(e))
+                print(f"Error looking up by name: {e}")
+                return None
+
+            if hasattr(name_lookup, "people") and name_lookup.people:
+                print(f"Found person by name: {name_lookup.people[0]}")
+                return self._to_result(linkedin_url, name_lookup.people[0].to_dict())
+
+        return None
+
+    def _to_result(self, linkedin_url, person):
+        return make_result(
+            self.name,
+            linkedin_url,
+            name=person.get("name"),
+            emails=person.get("emails"),
+            current_role=person.get("current_title") or person.get("current_role"),
+            current_employer=person.get("current_employer"),
+            raw=person,
+        )
+
+
+class RocketReachBrowserProvider(EnrichmentProvider):
+    """Look up profiles by driving the RocketReach website."""
+
+    name = "browser"
+
+    def __init__(self, browser_factory=None):
+        """
+        Args:
+            browser_factory: Callable returning an object with the RocketReachBrowser
+                interface. Defaults to RocketReachBrowser.
+        """
+        self.browser_factory = browser_factory
+        self.browser = None
+        self.login_failed = False
+        # A WebDriver can only serve one command stream at a time
+        self.lock = threading.Lock()
+
+    def _ensure_browser(self):
+        if self.browser or self.login_failed:
+            return self.browser is not None
+
+        if self.browser_factory is None:
+            from rocketreach_browser import RocketReachBrowser
+
+            self.browser_factory = RocketReachBrowser
+
+        print("Initializing RocketReach browser automation...")
+        self.browser = self.browser_factory()
+        self.browser.setup_driver()
+        if not self.browser.login():
+            print("Failed to login to RocketReach via browser. Cannot perform lookup.")
+            self.browser.close_driver()
+            self.browser = None
+            self.login_failed = True
+            return False
+        return True
+
+    def lookup(self, linkedin_url, name=None):
+        with self.lock:
+            if not self._ensure_browser():
+                return None
+            browser = self.browser
+
+        print(f"Searching for LinkedIn URL on RocketReach via browser: {linkedin_url}")
+        if getattr(browser, "concurrent", False):
+            email = browser.get_contact_email(linkedin_url)
+        else:
+            with self.lock:
+                email = browser.get_contact_email(linkedin_url)
+
+        if not email:
+            print(f"Could not find profile via browser for: {linkedin_url}")
+            return None
+
+        # The website does not expose SMTP validation, so treat the address
+        # as inconclusive rather than claiming it is verified.
+        return make_result(
+            self.name,
+            linkedin_url,
+            name=name,
+            emails=[{"email": email, "smtp_valid": "inconclusive"}],
+            raw={"email": email},
+        )
+
+    def close(self):
+        with self.lock:
+            if self.browser:
+                self.browser.close_driver()
+                self.browser = None
+
+
+class EnrichmentCache(EnrichmentProvider):
+    """
+    File of previous lookups keyed by canonical LinkedIn URL.
+
+    Each line is a JSON object mapping URLs to results, and every store
+    appends one line, so a lookup costs one small write instead of rewriting
+    the whole cache. Later lines win; the file is compacted to one line per
+    URL when loaded. (A cache written as a single JSON object is read the
+    same way.)
+    """
+
+    name = "cache"
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                if self._load():
+                    self._compact()
+                print(f"Loaded {len(self.entries)} cached RocketReach lookups")
+            except Exception as e:
+                print(f"Error reading enrichment cache {path}: {e}")
+
+    def _load(self):
+        """Read the cache file and return whether it needs compacting."""
+        lines = 0
+        complete = True
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                # A store appended after a line without its newline would
+                # corrupt both, so such a file is rewritten
+                complete = line.endswith("\n")
+                if not line.strip():
+                    continue
+                lines += 1
+                try:
+                    self.entries.update(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+        return lines != len(self.entries) or not complete
+
+    def _compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for url, result in self.entries.items():
+                f.write(json.dumps({url: result}, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, linkedin_url, name=None):
+        with self.lock:
+            cached = self.entries.get(canonical_linkedin_url(linkedin_url))
+        if not cached:
+            return None
+
+        result = EnrichmentResult.from_dict(cached)
+        result["source"] = self.name
+        return result
+
+    def store(self, linkedin_url, result):
+        """Save a result from another backend and append it to the cache file."""
+        url = canonical_linkedin_url(linkedin_url)
+        entry = dict(result)
+        line = json.dumps({url: entry}, default=str) + "\n"
+        with self.lock:
+            self.entries[url] = entry
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except Exception as e:
+                print(f"Error writing enrichment cache {self.path}: {e}")
+
+
+class EnrichmentService:
+    """
+    Front door for enrichment: cache first, then the primary backend, with the
+    secondary backend used as a fallback or, when hedging is enabled, raced
+    against a slow primary.
+    """
+
+    def __init__(
+        self,
+        primary,
+        secondary=None,
+        cache=None,
+        hedge=False,
+        hedge_delay=10.0,
+        min_samples=20,
+    ):
+        """
+        Args:
+            primary: The preferred EnrichmentProvider
+            secondary: Optional EnrichmentProvider used for fallback and hedging
+            cache: Optional EnrichmentCache consulted before any backend
+            hedge: If True, start the secondary when the primary is slower than its p95
+            hedge_delay: Seconds to wait before hedging until enough latencies are recorded
+            min_samples: Number of primary latencies needed before using the observed p95
+        """
+        self.primary = primary
+        self.secondary = secondary
+        self.cache = cache
+        self.hedge = hedge and secondary is not None
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=200)
+        self.providers = [p for p in (primary, secondary) if p]
+        self.lock = threading.Lock()  # Guards switching providers
+        self.stats = {"cache_hits": 0, "primary": 0, "secondary": 0, "hedged": 0}
+        self.executor = ThreadPoolExecutor(max_workers=4) if self.hedge else None
+
+    def p95_latency(self):
+        """Return the 95th percentile primary latency, or the default delay."""
+        if len(self.latencies) < self.min_samples:
+            return self.hedge_delay
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def _timed_primary(self, primary, linkedin_url, name):
+        started = time.time()
+        result = primary.lookup(linkedin_url, name=name)
+        self.latencies.append(time.time() - started)
+        return result
+
+    def _disable_provider(self, provider, error):
+        """
+        Stop using a provider that ran out of credits.
+
+        Lookups run on several threads, so the provider that raised may
+        already have been switched out; only the provider itself is dropped.
+        """
+        with self.lock:
+            if self.primary is provider:
+                print(
+                    f"{provider.name} credits exhausted ({error}). Switching to "
+                    f"{self.secondary.name if self.secondary else 'no'} lookup."
+                )
+                self.primary = self.secondary
+            elif self.secondary is provider:
+                print(f"{provider.name} credits exhausted ({error}). No fallback left.")
+            else:
+                return
+            self.secondary = None
+            self.hedge = False
+
+    def lookup(self, linkedin_url, name=None):
+        """
+        Look up a LinkedIn profile using the configured backends.
+
+        Args:
+            linkedin_url: The LinkedIn profile URL
+            name: The person's name, if known
+
+        Returns:
+            Result dictionary in the shared schema, or an empty dict if lookup failed
+        """
+        if self.cache:
+            cached = self.cache.lookup(linkedin_url)
+            if cached:
+                self.stats["cache_hits"] += 1
+                print(f"Using cached RocketReach data for {linkedin_url}")
+                return cached
+
+        if not self.primary:
+            return {}
+
+        if self.hedge:
+            result = self._hedged_lookup(linkedin_url, name)
+        else:
+            result = self._fallback_lookup(linkedin_url, name)
+
+        if result and self.cache:
+            self.cache.store(linkedin_url, result)
+        return result or {}
+
+    def _fallback_lookup(self, linkedin_url, name):
+        primary, secondary = self.primary, self.secondary
+        if not primary:
+            return None
+        try:
+            result = self._timed_primary(primary, linkedin_url, name)
+            self.stats["primary"] += 1
+            return result
+        except CreditsExhausted as e:
+            self._disable_provider(primary, e)
+            return self._fallback_lookup(linkedin_url, name)
+        except Exception as e:
+            print(f"Error during {primary.name} lookup: {e}")
+
+        if not secondary:
+            return None
+        try:
+            result = secondary.lookup(linkedin_url, name=name)
+            self.stats["secondary"] += 1
+            return result
+        except CreditsExhausted as e:
+            self._disable_provider(secondary, e)
+            return None
+        except Exception as e:
+            print(f"Error during {secondary.name} lookup: {e}")
+            return None
+
+    def _hedged_lookup(self, linkedin_url, name):
+        primary, secondary = self.primary, self.secondary
+        if not primary or not secondary:
+            # Hedging was switched off by another thread
+            return self._fallback_lookup(linkedin_url, name)
+        primary_future = self.executor.submit(
+            self._timed_primary, primary, linkedin_url, name
+        )
+        futures = {primary_future: primary}
+
+        done, _ = wait([primary_future], timeout=self.p95_latency())
+        if not done:
+            print(
+                f"{primary.name} lookup slower than p95, hedging with {secondary.name}"
+            )
+            self.stats["hedged"] += 1
+            futures[self.executor.submit(secondary.lookup, linkedin_url, name)] = (
+                secondary
+            )
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = futures[future]
+                try:
+                    result = future.result()
+                except CreditsExhausted as e:
+                    self._disable_provider(provider, e)
+                    result = None
+                except Exception as e:
+                    print(f"Error during {provider.name} lookup: {e}")
+                    result = None
+                else:
+                    if provider is primary:
+                        self.stats["primary"] += 1
+                    else:
+                        self.stats["secondary"] += 1
+                    # An empty answer from the primary is still an answer; only
+                    # errors fall through to the secondary.
+                    if result or provider is primary and len(futures) == 1:
+                        return result
+
+                if provider is primary and len(futures) == 1:
+                    future = self.executor.submit(secondary.lookup, linkedin_url, name)
+                    futures[future] = secondary
+                    pending.add(future)
+
+        return None
+
+    def close(self):
+        """Close every backend and stop the hedging threads."""
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        for provider in self.providers:
+            provider.close()
@@ -1,14 +1,20 @@
 import os
+import threading
 import time
+from functools import partial
 
-import pandas as pd
-import rocketreach
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 
-from rocketreach_browser import RocketReachBrowser
+from enrichment import (
+    EnrichmentCache,
+    EnrichmentService,
+    RocketReachAPIProvider,
+    RocketReachBrowserProvider,
+)
+from records import Profile
 
 SUPPORTED_LOCATIONS = {
     "dubai": 106204383,
@@ -30,21 +36,49 @@ SUPPORTED_COMPANIES = {
 
 
 class LinkedInScraper:
-    def __init__(self, email, password, rr_api_key=None):
-        """Initialize the LinkedIn scraper with login credentials and optional RocketReach API key."""
+    def __init__(
+        self,
+        email,
+        password,
+        rr_api_key=None,
+        rr_cache_path=None,
+        hedge_lookups=False,
+        rr_browser_sessions=1,
+        rr_browser_mode="window",
+    ):
+        """
+        Initialize the LinkedIn scraper with login credentials and optional RocketReach API key.
+
+        Args:
+            email: LinkedIn login email
+            password: LinkedIn login password
+            rr_api_key: Optional RocketReach API key
+            rr_cache_path: Optional file used to cache RocketReach lookups
+            hedge_lookups: If True, race the browser against API lookups slower than p95
+            rr_browser_sessions: Number of RocketReach browser sessions to keep logged in
+            rr_browser_mode: "window" starts a separate Chrome for RocketReach lookups,
+                "tab" runs them in a tab of this scraper's driver
+        """
         self.email = email
         self.password = password
         self.driver = None
         self.data = []
         self.rr_api_key = rr_api_key
         self.rr_client = None
+        self.rr_cache_path = rr_cache_path
+        self.hedge_lookups = hedge_lookups
+        self.rr_browser_sessions = rr_browser_sessions
+        self.rr_browser_mode = rr_browser_mode
+        self.enrichment = None  # Built on first RocketReach lookup
+        self.enrichment_lock = threading.Lock()
         self.current_profile_name = "N/A"  # Initialize current profile name
-        self.rr_browser = None  # Initialize RocketReach browser
         self.use_browser_fallback = False  # Flag to use browser fallback instead of API
 
         # Initialize RocketReach client if API key is provided
         if self.rr_api_key:
             try:
+                import rocketreach
+
                 self.rr_client = rocketreach.Gateway(api_key=self.rr_api_key)
                 print("RocketReach client initialized successfully")
             except Exception as e:
@@ -109,122 +143,68 @@ class LinkedInScraper:
             print(f"Error during login: {e}")
             return False
 
-    def lookup_rocketreach(self, linkedin_url):
+    def build_enrichment(self):
         """
-        Look up a LinkedIn profile on RocketReach to get additional information.
+        Build the enrichment service used for RocketReach lookups.
 
-        Args:
-            linkedin_url: The LinkedIn profile URL or contact info URL
+        The API is the primary backend when a client is available, with the
+        browser as its fallback (and hedge, if enabled). Without a client, or when
+        browser lookups were requested explicitly, the browser is the only backend.
 
         Returns:
-            Dictionary with RocketReach data or None if lookup failed
+            EnrichmentService instance
         """
-        # First check if we should use browser-based lookup (API exhausted or not available)
-        if self.use_browser_fallback:
-            return self.lookup_rocketreach_browser(linkedin_url)
-
-        if not self.rr_client:
-            print("RocketReach client not initialized. Skipping lookup.")
-            # Try browser-based lookup as fallback
-            return self.lookup_rocketreach_browser(linkedin_url)
-
-        try:
-            # Perform the lookup
-            lookup_result = self.rr_client.person.lookup(linkedin_url=linkedin_url)
-
-            if hasattr(lookup_result, "person") and lookup_result.person:
-                print(f"RocketReach lookup successful for {linkedin_url}")
-                return lookup_result.person.to_dict()
-            else:
-                print(f"No RocketReach data found for {linkedin_url}")
-
-                # Check for API credits exhausted error
-                if (
-                    hasattr(lookup_result, "error")
-                    and "credits" in str(lookup_result.error).lower()
-                ):
-                    print("API credits exhausted. Switching to browser-based lookup.")
-                    self.use_browser_fallback = True
-                    return self.lookup_rocketreach_browser(linkedin_url)
-
-                # Try an alternative approach - lookup by name if available
-                if (
-                    hasattr(self, "current_profile_name")
-                    and self.current_profile_name != "N/A"
-                ):
-                    print(f"Trying to look up by name: {self.current_profile_name}")
-                    try:
-                        name_lookup = self.rr_client.person.search(
-                            name=self.current_profile_name, limit=1
-                        )
-                        if (
-                            hasattr(name_lookup, "people")
-                            and name_lookup.people
-                            and len(name_lookup.people) > 0
-                        ):
-                            print(f"Found person by name: {name_lookup.people[0]}")
-                            return name_lookup.people[0].to_dict()
-                    except Exception as e:
-                        if "credits" in str(e).lower():
-                            print(
-                                "API credits exhausted. Switching to browser-based lookup."
-                            )
-                            self.use_browser_fallback = True
-                            return self.lookup_rocketreach_browser(linkedin_url)
-                        print(f"Error looking up by name: {e}")
-                        return {}
-
-                return {}
-        except Exception as e:
-            if "credits" in str(e).lower():
-                print("API credits exhausted. Switching to browser-based lookup.")
-                self.use_browser_fallback = True
-                return self.lookup_rocketreach_browser(linkedin_url)
-            print(f"Error looking up on RocketReach: {e}")
-            return {}
-
-    def lookup_rocketreach_browser(self, linkedin_url):
+        from rocketreach_browser import RocketReachBrowser, RocketReachBrowserPool
+
+        browser_factory = None
+        hedge = self.hedge_lookups
+        if self.rr_browser_mode == "tab":
+            # One driver serves both sites, so lookups must stay on the calling
+            # thread: no concurrent sessions and no hedged browser lookups.
+            browser_factory = partial(RocketReachBrowser, driver=self.driver)
+            hedge = False
+        elif self.rr_browser_sessions > 1:
+            browser_factory = partial(
+                RocketReachBrowserPool, size=self.rr_browser_sessions
+            )
+        browser_provider = RocketReachBrowserProvider(browser_factory)
+        if self.rr_client and not self.use_browser_fallback:
+            primary = RocketReachAPIProvider(self.rr_client)
+            secondary = browser_provider
+        else:
+            primary = browser_provider
+            secondary = None
+
+        cache = EnrichmentCache(self.rr_cache_path) if self.rr_cache_path else None
+        return EnrichmentService(primary, secondary=secondary, cache=cache, hedge=hedge)
+
+    @property
+    def lookups_concurrent(self):
+        """Whether enrich_profile() may run on several threads at once."""
+        # In tab mode the lookups drive this scraper's own (single) browser
+        return self.rr_browser_mode != "tab"
+
+    def lookup_rocketreach(self, linkedin_url, name=None):
         """
-        Look up a LinkedIn profile on RocketReach using browser automation.
-        This is used as a fallback when API credits are exhausted.
+        Look up a LinkedIn profile on RocketReach to get additional information.
 
         Args:
-            linkedin_url: The LinkedIn profile URL
+            linkedin_url: The LinkedIn profile URL or contact info URL
+            name: Person's name, for a lookup by name (default: the last scraped profile's)
 
         Returns:
-            Dictionary with RocketReach data or empty dict if lookup failed
+            Dictionary in the enrichment result schema, or an empty dict if lookup failed
         """
-        try:
-            # Initialize the RocketReach browser if not already done
-            if not self.rr_browser:
-                print("Initializing RocketReach browser automation...")
-                self.rr_browser = RocketReachBrowser()
-                self.rr_browser.setup_driver()
-
-                # Try to login
-                if not self.rr_browser.login():
-                    print(
-                        "Failed to login to RocketReach via browser. Cannot perform lookup."
-                    )
-                    return {}
+        with self.enrichment_lock:
+            if self.enrichment is None:
+                self.enrichment = self.build_enrichment()
 
-            # Search for the LinkedIn URL on RocketReach
-            print(
-                f"Searching for LinkedIn URL on RocketReach via browser: {linkedin_url}"
+        try:
+            return self.enrichment.lookup(
+                linkedin_url, name=name or self.current_profile_name
             )
-            profile_data = self.rr_browser.search_by_linkedin_url(linkedin_url)
-
-            if profile_data:
-                print(
-                    f"Successfully found profile via browser: {profile_data.get('name', 'Unknown')}"
-                )
-                return profile_data
-            else:
-                print(f"Could not find profile via browser for: {linkedin_url}")
-                return {}
-
         except Exception as e:
-            print(f"Error during browser-based RocketReach lookup: {e}")
+            print(f"Error looking up on RocketReach: {e}")
             return {}
 
     def extract_contact_info_url(self, profile_url):
@@ -293,13 +273,14 @@ class LinkedInScraper:
             print(f"Error extracting contact info: {e}")
             return None, None, None, None
 
-    def scrape_profile(self, profile_url):
+    def scrape_profile(self, profile_url, enrich=True):
         """
         Visit a profile and extract basic information.
 
         Args:
             profile_url: The LinkedIn profile URL to scrape
-            already_on_page: If True, assumes we're already on the profile page
+            enrich: If False, skip the RocketReach lookup so the caller can run
+                enrich_profile() later, outside its lock on the browser
         """
         try:
             print(f"Visiting profile: {profile_url}")
@@ -397,41 +378,22 @@ class LinkedInScraper:
                 except:
                     continue
 
-            # Look up additional information from RocketReach
-            rr_data = None
-            if self.rr_client:
-                print(f"Looking up profile on RocketReach: {profile_url}")
-                rr_data = self.lookup_rocketreach(profile_url)
-
-            try:
-                valid_emails = [
-                    email["email"]
-                    for email in rr_data["emails"]
-                    if email["smtp_valid"] == "valid"
-                    or email["smtp_valid"] == "inconclusive"
-                ]
-                current_role = rr_data.get("current_role", "N/A")
-                current_employer = rr_data.get("current_employer", "N/A")
-            except:
-                valid_emails = []
-                current_role = "N/A"
-                current_employer = "N/A"
-
-            # Convert RocketReach data to JSON string for storage
-            additional_info = rr_data or "N/A"
-
             # Store the extracted data
-            profile_data = {
-                "Name": name,
-                "Headline": headline,
-                "Location": location,
-                "About": sanitize_text_for_csv(about),
-                "Valid Emails": valid_emails,
-                "Current Position": current_role,
-                "Current Employer": current_employer,
-                "Profile URL": profile_url,
-                "Additional Info": additional_info,  # Add RocketReach data
-            }
+            profile_data = Profile(
+                name=name,
+                headline=headline,
+                location=location,
+                about=sanitize_text_for_csv(about),
+                valid_emails=[],
+                current_position="N/A",
+                current_employer="N/A",
+                profile_url=profile_url,
+                additional_info="N/A",
+            )
+
+            # Look up additional information from RocketReach
+            if enrich:
+                self.enrich_profile(profile_data)
 
             print(f"Scraped profile: {name}")
             return profile_data
@@ -439,13 +401,54 @@ class LinkedInScraper:
         except Exception as e:
             print(f"Error scraping profile {profile_url}: {e}")
 
+    def enrich_profile(self, profile_data):
+        """
+        Add RocketReach emails, current role and employer to a scraped profile.
+
+        Args:
+            profile_data: Profile returned by scrape_profile()
+
+        Returns:
+            The same profile, updated in place
+        """
+        if not (self.rr_client or self.use_browser_fallback):
+            return profile_data
+
+        profile_url = profile_data["Profile URL"]
+        print(f"Looking up profile on RocketReach: {profile_url}")
+        rr_data = self.lookup_rocketreach(profile_url, name=profile_data.get("Name"))
+
+        try:
+            valid_emails = [
+                email["email"]
+                for email in rr_data["emails"]
+                if email["smtp_valid"] == "valid"
+                or email["smtp_valid"] == "inconclusive"
+            ]
+            current_role = rr_data.get("current_role", "N/A")
+            current_employer = rr_data.get("current_employer", "N/A")
+        except:
+            valid_emails = []
+            current_role = "N/A"
+            current_employer = "N/A"
+
+        profile_data["Valid Emails"] = valid_emails
+        profile_data["Current Position"] = current_role
+        profile_data["Current Employer"] = current_employer
+        # Keep the backend's raw payload for storage (kept out-of-line)
+        if rr_data:
+            profile_data["Additional Info"] = rr_data.get("raw") or dict(rr_data)
+        return profile_data
+
     def close(self):
         """Close the browser."""
+        # Close the RocketReach backends (including any browser that was opened)
+        # first: in tab mode they still have tabs open in this driver
+        if self.enrichment:
+            self.enrichment.close()
+            self.enrichment = None
         if self.driver:
             self.driver.quit()
-        # Close the RocketReach browser if it was opened
-        if self.rr_browser:
-            self.rr_browser.close()
 
     def visit_profiles(
         self,
@@ -465,6 +468,8 @@ class LinkedInScraper:
             num_profiles: Maximum number of profiles to visit
             location: The location to search for
         """
+        import pandas as pd
+
         try:
             #  Build the search URL with optional location filter
             base_url = "https://www.linkedin.com/search/results/people/?keywords="
@@ -572,7 +577,7 @@ class LinkedInScraper:
             for profile_url in profiles_to_visit:
                 try:
                     profile_data = self.scrape_profile(profile_url)
-                    profile_data = pd.DataFrame([profile_data])
+                    profile_data = pd.DataFrame([profile_data.to_dict()])
                     if not os.path.exists(filename):
                         profile_data.to_csv(filename, index=False)
                     else:
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of LLM responses, keyed by a hash of the request content.
+
+    Entries live in a SQLite file so they survive crashes and re-runs. Once the
+    cache holds more than max_entries, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path="llm_cache.sqlite3", max_entries=20000, enabled=True):
+        """
+        Args:
+            path: SQLite file holding the cache
+            max_entries: Number of responses to keep before evicting the oldest
+            enabled: If False, every lookup misses and nothing is stored
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        self.conn = None
+        if enabled:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access "
+                "ON responses (last_access)"
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def make_key(model, system, prompt, max_tokens):
+        """
+        Hash everything that determines the model's answer.
+
+        Args:
+            model: Model name
+            system: System prompt (string or list of content blocks)
+            prompt: Rendered user prompt (string or list of content blocks)
+            max_tokens: Output token limit
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        content = json.dumps([model, system, prompt, max_tokens], sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        if not self.enabled:
+            self.stats["misses"] += 1
+            return None
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key, response):
+        """Store a response and evict the least recently used entries past the cap."""
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, last_access) "
+                "VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+            self.stats["writes"] += 1
+
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self.stats["evictions"] += excess
+            self.conn.commit()
+
+    def clear(self):
+        """Invalidate every cached response."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def hit_rate(self):
+        """Return the share of lookups answered from the cache, as a percentage."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups * 100 if lookups else 0.0
+
+    def close(self):
+        """Close the SQLite connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        self.enabled = False
@@ -0,0 +1,144 @@
+import math
+import os
+import threading
+from collections import deque
+
+from prompt_context import estimate_tokens, is_empty
+from template_renderer import LocalRenderer
+
+# Default models by tier (overridable through the environment variable), with
+# list prices in dollars per million tokens. Prompt-cache writes cost 1.25x the
+# input price and reads 0.1x.
+MODEL_TIERS = {
+    "fast": {
+        "model": "claude-3-haiku-20240307",
+        "env": "CLAUDE_FAST_MODEL",
+        "input_cost": 0.25,
+        "output_cost": 1.25,
+    },
+    "standard": {
+        "model": "claude-3-sonnet-20240229",
+        "env": "CLAUDE_STANDARD_MODEL",
+        "input_cost": 3.0,
+        "output_cost": 15.0,
+    },
+}
+TIER_ORDER = ["fast", "standard"]
+
+# Context fields that make a profile worth the larger model
+RICH_KEYS = ["about", "About", "additional_info"]
+
+
+class ModelRouter:
+    """
+    Choose the model tier for each personalization request.
+
+    With the "auto" policy, data-light contacts go to the fast tier and rich
+    profiles (an About section, a long context, or a rich_personalization
+    flag) to the standard tier. Requests that fail on one tier are retried on
+    the others. Latency, token and cost counters are kept per tier.
+    """
+
+    def __init__(self, policy="auto", rich_context_tokens=60):
+        """
+        Args:
+            policy: "auto", or a tier name to send every request to
+            rich_context_tokens: Estimated context tokens above which a contact
+                counts as a rich profile
+        """
+        self.policy = policy
+        self.rich_context_tokens = rich_context_tokens
+        self.models = {
+            tier: os.getenv(MODEL_TIERS[tier]["env"], MODEL_TIERS[tier]["model"])
+            for tier in TIER_ORDER
+        }
+        self.stats = {
+            tier: {
+                "requests": 0,
+                "errors": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cost": 0.0,
+                "latencies": deque(maxlen=1000),
+            }
+            for tier in TIER_ORDER
+        }
+        self.lock = threading.Lock()
+
+    def choose(self, contact_data, context_text):
+        """
+        Pick the tier for one contact.
+
+        Args:
+            contact_data: Contact data from CSV and/or LinkedIn
+            context_text: Recipient context built for the prompt
+
+        Returns:
+            str: Tier name
+        """
+        if self.policy != "auto":
+            return self.policy
+        if (
+            LocalRenderer.is_flagged(contact_data)
+            or any(not is_empty(contact_data.get(key)) for key in RICH_KEYS)
+            or estimate_tokens(context_text) > self.rich_context_tokens
+        ):
+            return "standard"
+        return "fast"
+
+    def tier_for_model(self, model):
+        """Return the tier a model belongs to, or None for an unknown model."""
+        for tier, tier_model in self.models.items():
+            if tier_model == model:
+                return tier
+        return None
+
+    def fallback_tiers(self, tier):
+        """Return the tiers to try, starting with tier."""
+        return [tier] + [other for other in TIER_ORDER if other != tier]
+
+    def record(self, tier, usage, latency=None):
+        """Add a successful response's tokens, cost and latency to a tier's counters."""
+        prices = MODEL_TIERS[tier]
+        input_tokens = usage.get("input_tokens") or 0
+        output_tokens = usage.get("output_tokens") or 0
+        cost = (
+            input_tokens * prices["input_cost"]
+            + (usage.get("cache_creation_input_tokens") or 0)
+            * prices["input_cost"]
+            * 1.25
+            + (usage.get("cache_read_input_tokens") or 0) * prices["input_cost"] * 0.1
+            + output_tokens * prices["output_cost"]
+        ) / 1e6
+        with self.lock:
+            stats = self.stats[tier]
+            stats["requests"] += 1
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["cost"] += cost
+            if latency is not None:
+                stats["latencies"].append(latency)
+
+    def record_error(self, tier):
+        """Count a failed request on a tier."""
+        with self.lock:
+            self.stats[tier]["errors"] += 1
+
+    def report(self):
+        """Return one line of counters per tier."""
+        lines = []
+        for tier in TIER_ORDER:
+            stats = self.stats[tier]
+            latencies = sorted(stats["latencies"])
+            if latencies:
+                mean = sum(latencies) / len(latencies)
+                p95 = latencies[math.ceil(len(latencies) * 0.95) - 1]
+                latency = f"mean latency {mean:.2f}s, p95 {p95:.2f}s"
+            else:
+                latency = "no timed requests"
+            lines.append(
+                f"{tier} ({self.models[tier]}): {stats['requests']} requests, "
+                f"{stats['errors']} errors, {latency}, {stats['input_tokens']} input / "
+                f"{stats['output_tokens']} output tokens, ${stats['cost']:.4f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,76 @@
+from records import Contact
+
+
+def field_name(column):
+    """Standardize an unmapped CSV column name (lowercase, underscores)."""
+    return str(column).lower().replace(" ", "_")
+
+
+def contact_fields(columns, column_map):
+    """
+    Return the keys normalize_contacts() gives rows of a CSV with these columns.
+
+    Args:
+        columns (list): CSV column names
+        column_map (dict): Mapping of standardized names to CSV column names
+
+    Returns:
+        list: Standardized names of the mapped columns, then the unmapped
+        columns' field names, in CSV order
+    """
+    mapped_columns = set(column_map.values())
+    fields = [
+        standard_field
+        for standard_field, csv_field in column_map.items()
+        if csv_field in columns
+    ]
+    fields += [field_name(column) for column in columns if column not in mapped_columns]
+    return list(dict.fromkeys(fields))
+
+
+def normalize_contacts(df, column_map):
+    """
+    Build a Contact record for every row of a DataFrame.
+
+    Works column by column: mapped columns are renamed to their standardized
+    names and unmapped ones to lowercase_with_underscores once, the null mask
+    is computed once, and records come out of to_dict("records"). Null values
+    are left out of each record.
+
+    Args:
+        df (pandas.DataFrame): Contacts, one per row
+        column_map (dict): Mapping of standardized names to CSV column names
+
+    Returns:
+        list: One Contact record per row, in DataFrame order
+    """
+    import pandas as pd
+
+    mapped_columns = set(column_map.values())
+    targets = {}
+    for standard_field, csv_field in column_map.items():
+        if csv_field in df.columns:
+            targets[standard_field] = df[csv_field]
+    for column in df.columns:
+        if column not in mapped_columns:
+            # Unmapped columns are added after mapped ones and win on a clash,
+            # except where they are empty
+            name = field_name(column)
+            values = df[column]
+            if name in targets:
+                values = values.where(values.notna(), targets[name])
+            targets[name] = values
+
+    if not targets:
+        return [Contact() for _ in range(len(df))]
+
+    frame = pd.DataFrame(targets, index=df.index)
+    frame = frame.astype(object).where(frame.notna(), None)
+    contacts = []
+    for record in frame.to_dict("records"):
+        contact = Contact()
+        for key, value in record.items():
+            if value is not None:
+                contact[key] = value
+        contacts.append(contact)
+    return contacts
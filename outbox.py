@@ -0,0 +1,139 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class Outbox:
+    """
+    Durable record of personalized emails and whether they were delivered.
+
+    Each message is keyed by its (recipient, campaign) pair, so a re-run after
+    a crash can skip emails that already went out and send the pending ones
+    without personalizing them again.
+    """
+
+    def __init__(self, path="outbox.sqlite3"):
+        """
+        Args:
+            path: SQLite file holding the outbox
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "key TEXT PRIMARY KEY, recipient TEXT NOT NULL, campaign TEXT NOT NULL, "
+            "subject TEXT NOT NULL, body TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "error TEXT, created_at REAL NOT NULL, sent_at REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS messages_campaign_status "
+            "ON messages (campaign, status)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(recipient, campaign):
+        """Return the idempotency key for sending a campaign to a recipient."""
+        content = f"{recipient.strip().lower()}\n{campaign}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, recipient, campaign):
+        """Return the stored message as a dict, or None if it was never enqueued."""
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT key, recipient, campaign, subject, body, status, attempts, error "
+                "FROM messages WHERE key = ?",
+                (self.make_key(recipient, campaign),),
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def is_sent(self, recipient, campaign):
+        """Check whether a campaign email was already delivered to a recipient."""
+        message = self.get(recipient, campaign)
+        return message is not None and message["status"] == "sent"
+
+    def enqueue(self, recipient, campaign, subject, body):
+        """
+        Store a personalized email as pending, unless one is already stored.
+
+        Returns:
+            str: The message's idempotency key
+        """
+        key = self.make_key(recipient, campaign)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO messages "
+                "(key, recipient, campaign, subject, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, recipient, campaign, subject, body, time.time()),
+            )
+            self.conn.commit()
+        return key
+
+    def pending(self, campaign=None):
+        """
+        Return the messages still waiting to be delivered (pending or failed).
+
+        Args:
+            campaign: Only return this campaign's messages (default: all campaigns)
+
+        Returns:
+            list: Message dicts with key, recipient, campaign, subject and body
+        """
+        query = (
+            "SELECT key, recipient, campaign, subject, body FROM messages "
+            "WHERE status != 'sent'"
+        )
+        params = ()
+        if campaign is not None:
+            query += " AND campaign = ?"
+            params = (campaign,)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY created_at", params).fetchall()
+        return [
+            dict(zip(("key", "recipient", "campaign", "subject", "body"), row))
+            for row in rows
+        ]
+
+    def mark_sent(self, key):
+        """Record that a message was delivered."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE messages SET status = 'sent', attempts = attempts + 1, "
+                "error = NULL, sent_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self.conn.commit()
+
+    def mark_failed(self, key, error):
+        """Record a failed delivery attempt; the message stays in the outbox."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE messages SET status = 'failed', attempts = attempts + 1, "
+                "error = ? WHERE key = ?",
+                (str(error), key),
+            )
+            self.conn.commit()
+
+    def counts(self, campaign=None):
+        """Return the number of messages in each status."""
+        query = "SELECT status, COUNT(*) FROM messages"
+        params = ()
+        if campaign is not None:
+            query += " WHERE campaign = ?"
+            params = (campaign,)
+        with self.lock:
+            rows = self.conn.execute(query + " GROUP BY status", params).fetchall()
+        return dict(rows)
+
+    def close(self):
+        """Close the SQLite connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
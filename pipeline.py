@@ -0,0 +1,314 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Marks an item dropped before reaching a ReorderGate
+_SKIPPED = object()
+
+# Seconds an idle worker waits for an item before checking for a stop
+_POLL_INTERVAL = 0.1
+
+
+class RateLimiter:
+    """Let at most rate calls per second through, across threads."""
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate: Calls per second (None or 0 for no limit)
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take the next call slot and return the seconds to wait for it."""
+        if not self.interval:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        return max(delay, 0.0)
+
+    def wait(self):
+        """Block until the next call is allowed."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ReorderGate:
+    """
+    Put items back in input order in front of an ordered stage.
+
+    Items arrive with their sequence numbers in whatever order the earlier
+    stages finish them, wait here until every earlier item has either gone
+    through or been dropped, and are then queued in order.
+    """
+
+    def __init__(self, outbox):
+        """
+        Args:
+            outbox: Queue of the ordered stage
+        """
+        self.outbox = outbox
+        self.lock = threading.Lock()
+        self.next_seq = 0
+        self.waiting = {}  # seq -> item, or _SKIPPED
+        self.stats = {"held_max": 0}
+
+    def put(self, seq, item):
+        """Add an item; it is queued once the items before it are."""
+        with self.lock:
+            self.waiting[seq] = item
+            self.stats["held_max"] = max(self.stats["held_max"], len(self.waiting))
+            self._release()
+
+    def skip(self, seq):
+        """Note that an item was dropped before reaching the gate."""
+        with self.lock:
+            self.waiting[seq] = _SKIPPED
+            self._release()
+
+    def _release(self):
+        while self.next_seq in self.waiting:
+            item = self.waiting.pop(self.next_seq)
+            if item is not _SKIPPED:
+                self.outbox.put((self.next_seq, item))
+            self.next_seq += 1
+
+
+class Stage:
+    """One step of a Pipeline, run by its own pool of worker threads."""
+
+    def __init__(self, name, func, workers=1, rate_limit=None, ordered=False):
+        """
+        Args:
+            name: Stage name, for metrics
+            func: Callable taking an item and returning the item for the next
+                stage, or None to drop it
+            workers: Threads running func concurrently
+            rate_limit: Most items per second this stage may start (None is unlimited)
+            ordered: Start items in input order (with one worker, process them
+                in input order), however the earlier stages finish them
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.ordered = ordered
+        self.limiter = RateLimiter(rate_limit)
+        self.stats = {
+            "processed": 0,
+            "dropped": 0,
+            "discarded": 0,
+            "errors": 0,
+            "busy_seconds": 0.0,
+            "depth_total": 0,
+            "depth_samples": 0,
+            "depth_max": 0,
+        }
+        self.lock = threading.Lock()
+        self.finished_workers = 0
+
+
+class Pipeline:
+    """
+    Run items through stages connected by bounded queues.
+
+    Every stage works on a different item at the same time, so a slow stage
+    (LinkedIn, Claude, SMTP) no longer leaves the others idle. A full queue
+    makes the stages before it wait, which keeps memory bounded. The depth
+    of every stage's input queue is sampled for the report. An ordered
+    stage gets its items back in input order through a ReorderGate. Once stopped
+    (on KeyboardInterrupt), workers finish the item in hand and throw away
+    whatever is still queued.
+    """
+
+    def __init__(self, stages, queue_size=100, sample_interval=0.5):
+        """
+        Args:
+            stages: Stages in order
+            queue_size: Capacity of the queue in front of each stage
+            sample_interval: Seconds between queue depth samples
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.sample_interval = sample_interval
+        self.loaded = 0
+        self.elapsed = 0.0
+        self.stopped = threading.Event()
+        self.threads = []
+        self.gates = {}  # stage index -> ReorderGate in front of it
+
+    def stop(self, wait=False):
+        """
+        Discard queued items instead of processing them.
+
+        Args:
+            wait: Block until every worker has finished the item in hand and
+                exited, so the resources the stages use can be released
+        """
+        self.stopped.set()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+    def _skip(self, index, seq):
+        # Ordered stages after this one must not wait for a dropped item
+        for gate_index, gate in self.gates.items():
+            if gate_index > index:
+                gate.skip(seq)
+
+    def _worker(self, index, queues):
+        stage = self.stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        gate = self.gates.get(index + 1)
+        while True:
+            try:
+                item = inbox.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                # Once stopped, no _DONE may arrive; an empty inbox is the end
+                if self.stopped.is_set():
+                    break
+                continue
+            if item is _DONE:
+                break
+            if self.stopped.is_set():
+                with stage.lock:
+                    stage.stats["discarded"] += 1
+                continue
+
+            seq, item = item
+            stage.limiter.wait()
+            started = time.time()
+            try:
+                result = stage.func(item)
+            except Exception:
+                logger.exception(f"Error in pipeline stage {stage.name}")
+                result = None
+                with stage.lock:
+                    stage.stats["errors"] += 1
+            with stage.lock:
+                stage.stats["busy_seconds"] += time.time() - started
+                stage.stats["processed"] += 1
+                if result is None and outbox is not None:
+                    stage.stats["dropped"] += 1
+
+            if result is None:
+                self._skip(index, seq)
+            elif outbox is not None:
+                if self.stopped.is_set():
+                    with stage.lock:
+                        stage.stats["discarded"] += 1
+                elif gate is not None:
+                    gate.put(seq, result)
+                else:
+                    outbox.put((seq, result))
+
+        # The last worker of a stage tells the next stage's workers to finish
+        with stage.lock:
+            stage.finished_workers += 1
+            last = stage.finished_workers == stage.workers
+        if last and outbox is not None and not self.stopped.is_set():
+            for _ in range(self.stages[index + 1].workers):
+                outbox.put(_DONE)
+
+    def _finish(self, queues):
+        # Tell the first stage its input is done (stopped workers exit on
+        # their own), then wait for every stage
+        if not self.stopped.is_set():
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+        for thread in self.threads:
+            thread.join()
+
+    def _sample(self, queues, stop):
+        while not stop.wait(self.sample_interval):
+            for stage, stage_queue in zip(self.stages, queues):
+                depth = stage_queue.qsize()
+                with stage.lock:
+                    stage.stats["depth_total"] += depth
+                    stage.stats["depth_samples"] += 1
+                    stage.stats["depth_max"] = max(stage.stats["depth_max"], depth)
+
+    def run(self, items):
+        """
+        Feed items through every stage and wait until the last one is done.
+
+        Args:
+            items: Iterable of input items, read lazily (this is the load stage)
+        """
+        started = time.time()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.gates = {
+            index: ReorderGate(queues[index])
+            for index, stage in enumerate(self.stages)
+            if stage.ordered and index > 0
+        }
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(index, queues),
+                    name=f"{stage.name}-{n}",
+                    daemon=True,
+                )
+                thread.start()
+                self.threads.append(thread)
+
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample, args=(queues, stop), daemon=True
+        )
+        sampler.start()
+
+        # An interrupt can arrive while loading or while waiting for the
+        # workers (the usual case for a short CSV); either way they stop
+        try:
+            try:
+                for item in items:
+                    queues[0].put((self.loaded, item))
+                    self.loaded += 1
+            except Exception:
+                # Rows loaded before the input failed are still processed
+                self._finish(queues)
+                raise
+            self._finish(queues)
+        except KeyboardInterrupt:
+            logger.info("Pipeline interrupted, discarding queued rows")
+            self.stop()
+            raise
+        finally:
+            stop.set()
+            sampler.join()
+            self.elapsed = time.time() - started
+
+    def report(self):
+        """Return one line of metrics per stage."""
+        lines = [f"load: {self.loaded} rows in {self.elapsed:.1f}s"]
+        for index, stage in enumerate(self.stages):
+            stats = stage.stats
+            mean_depth = (
+                stats["depth_total"] / stats["depth_samples"]
+                if stats["depth_samples"]
+                else 0.0
+            )
+            line = (
+                f"{stage.name}: {stage.workers} workers, {stats['processed']} processed, "
+                f"{stats['dropped']} dropped, {stats['discarded']} discarded, "
+                f"{stats['errors']} errors, "
+                f"busy {stats['busy_seconds']:.1f}s, queue depth mean "
+                f"{mean_depth:.1f} max {stats['depth_max']}"
+            )
+            if index in self.gates:
+                line += f", held for ordering max {self.gates[index].stats['held_max']}"
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,142 @@
+import ast
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from enrichment import canonical_linkedin_url
+from records import Profile
+
+logger = logging.getLogger(__name__)
+
+# Columns written by LinkedInScraper.visit_profiles() that hold Python lists
+LIST_COLUMNS = ("Valid Emails",)
+
+
+class ProfileStore:
+    """
+    Already-scraped LinkedIn profiles, looked up by canonical profile URL.
+
+    Profiles come from the linkedin_profiles_*.csv files written by
+    LinkedInScraper.visit_profiles() (dated by the file's modification time)
+    and from a JSONL file that every fresh scrape is appended to. Entries older
+    than max_age_days are treated as missing, so the profile is scraped again.
+    """
+
+    def __init__(
+        self,
+        path="linkedin_profiles_store.jsonl",
+        csv_pattern="linkedin_profiles_*.csv",
+        max_age_days=30,
+    ):
+        """
+        Args:
+            path: JSONL file of scraped profiles (read, then appended to)
+            csv_pattern: Glob of profile CSVs to load (None to skip them)
+            max_age_days: Age after which a stored profile is scraped again
+        """
+        self.path = path
+        self.max_age = max_age_days * 24 * 3600
+        self.profiles = {}  # canonical URL -> (scraped_at, Profile)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "stale": 0, "misses": 0, "stored": 0}
+        if csv_pattern:
+            for csv_path in sorted(glob.glob(csv_pattern)):
+                self._load_csv(csv_path)
+        if path and os.path.exists(path):
+            self._load_jsonl(path)
+        logger.info(f"Profile store loaded {len(self.profiles)} profiles")
+
+    def _remember(self, url, scraped_at, profile):
+        if not isinstance(profile, Profile):
+            profile = Profile.from_dict(profile)
+        key = canonical_linkedin_url(url)
+        current = self.profiles.get(key)
+        if current is None or current[0] <= scraped_at:
+            self.profiles[key] = (scraped_at, profile)
+
+    def _load_csv(self, csv_path):
+        import pandas as pd
+
+        try:
+            df = pd.read_csv(csv_path)
+        except Exception as e:
+            logger.warning(f"Error reading profiles from {csv_path}: {e}")
+            return
+        if "Profile URL" not in df.columns:
+            return
+
+        scraped_at = os.path.getmtime(csv_path)
+        df = df.astype(object).where(df.notna(), None)
+        for profile in df.to_dict("records"):
+            if not profile.get("Profile URL"):
+                continue
+            for column in LIST_COLUMNS:
+                value = profile.get(column)
+                if isinstance(value, str) and value.startswith("["):
+                    try:
+                        profile[column] = ast.literal_eval(value)
+                    except (ValueError, SyntaxError):
+                        pass
+            profile = {
+                key: value for key, value in profile.items() if value is not None
+            }
+            self._remember(profile["Profile URL"], scraped_at, profile)
+
+    def _load_jsonl(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._remember(
+                        record["url"], record["scraped_at"], record["profile"]
+                    )
+                except (ValueError, KeyError):
+                    # A line cut short by a crash
+                    continue
+
+    def get(self, url):
+        """
+        Return the stored profile for a URL if it is fresh enough.
+
+        Returns:
+            Profile: A copy of the profile, or None if it is missing or stale
+        """
+        key = canonical_linkedin_url(url)
+        with self.lock:
+            entry = self.profiles.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            scraped_at, profile = entry
+            if time.time() - scraped_at > self.max_age:
+                self.stats["stale"] += 1
+                return None
+            self.stats["hits"] += 1
+        return profile.copy()
+
+    def put(self, url, profile):
+        """Store a freshly scraped profile and append it to the JSONL file."""
+        scraped_at = time.time()
+        record = {
+            "url": canonical_linkedin_url(url),
+            "scraped_at": scraped_at,
+            "profile": dict(profile),
+        }
+        line = json.dumps(record, default=str, ensure_ascii=False) + "\n"
+        with self.lock:
+            self._remember(url, scraped_at, profile)
+            self.stats["stored"] += 1
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+    def report(self):
+        """Return a one-line summary of lookups."""
+        return (
+            f"{self.stats['hits']} reused (browser visits avoided), "
+            f"{self.stats['stale']} stale, {self.stats['misses']} not stored, "
+            f"{self.stats['stored']} newly scraped"
+        )
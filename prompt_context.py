@@ -0,0 +1,179 @@
+import threading
+from collections import Counter
+
+# Contact fields in order of usefulness for personalization. Each entry gives the
+# label shown to Claude, the keys the value may be stored under (standardized
+# names from process_csv(), raw CSV headers and scraped LinkedIn keys), and the
+# most characters of the value to keep.
+RANKED_FIELDS = [
+    ("Role/Title", ["position", "Title", "current_position", "headline"], 120),
+    ("Company/Employer", ["company", "Account Name", "current_employer"], 120),
+    ("Assets Under Management", ["aum", "AUM"], 40),
+    ("Account Type", ["account_type", "Account Type"], 60),
+    ("Contact Type", ["contact_type", "Contact Type"], 60),
+    ("Location", ["location", "Location"], 80),
+    ("About", ["about", "About"], 400),
+]
+
+# Keys that never help personalization: identifiers, addresses, raw payloads
+# and the flag columns read by template_renderer
+EXCLUDED_KEYS = {
+    "name",
+    "email",
+    "email_id",
+    "linkedin_url",
+    "linkedin_ids",
+    "profile_url",
+    "valid_emails",
+    "additional_info",
+    "rich_personalization",
+    "personalize",
+}
+
+NAME_KEYS = ["name", "Name", "full_name", "contact_name"]
+EMPTY_VALUES = {"", "n/a", "nan", "none", "[]", "{}"}
+
+
+def estimate_tokens(text):
+    """Rough token count for English text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def is_empty(value):
+    """Check whether a contact value carries no information."""
+    return value is None or str(value).strip().lower() in EMPTY_VALUES
+
+
+def contact_name(contact_data):
+    """Return the contact's full name, or "N/A" if none is available."""
+    for key in NAME_KEYS:
+        value = contact_data.get(key)
+        if not is_empty(value):
+            return str(value).strip()
+    return "N/A"
+
+
+def truncate(text, limit):
+    """Shorten text to at most limit characters, cutting at a word boundary."""
+    text = " ".join(str(text).split())
+    if len(text) <= limit:
+        return text
+    cut = text[: limit - 3].rsplit(" ", 1)[0]
+    return f"{cut}..."
+
+
+class ContextBuilder:
+    """
+    Turn contact data into a compact, token-budgeted recipient description.
+
+    Known fields are added in order of relevance and truncated; other scalar
+    fields follow, shorter still. Values already present under another key
+    are dropped, and lines that would exceed the budget are skipped.
+    """
+
+    def __init__(self, token_budget=300, max_extra_fields=5, extra_field_chars=80):
+        """
+        Args:
+            token_budget: Most estimated tokens for the recipient context lines
+            max_extra_fields: Most fields to include beyond RANKED_FIELDS
+            extra_field_chars: Character limit for each of those extra fields
+        """
+        self.token_budget = token_budget
+        self.max_extra_fields = max_extra_fields
+        self.extra_field_chars = extra_field_chars
+        self.histogram = Counter()
+        self.stats = {"prompts": 0, "total_tokens": 0, "max_tokens": 0, "dropped": 0}
+        self.lock = threading.Lock()
+
+    def candidate_lines(self, contact_data):
+        """Return every "- Label: value" line in priority order, before budgeting."""
+        lines = []
+        used_keys = set()
+        seen_values = {contact_name(contact_data).lower()}
+
+        for label, keys, limit in RANKED_FIELDS:
+            for key in keys:
+                value = contact_data.get(key)
+                if is_empty(value) or isinstance(value, (dict, list)):
+                    continue
+                value = truncate(value, limit)
+                used_keys.update(keys)
+                if value.lower() not in seen_values:
+                    seen_values.add(value.lower())
+                    lines.append(f"- {label}: {value}")
+                break
+
+        extras = 0
+        for key, value in contact_data.items():
+            if extras >= self.max_extra_fields:
+                break
+            normalized_key = str(key).lower().replace(" ", "_")
+            if (
+                key in used_keys
+                or normalized_key in EXCLUDED_KEYS
+                or is_empty(value)
+                or isinstance(value, (dict, list))
+            ):
+                continue
+            value = truncate(value, self.extra_field_chars)
+            if value.lower() in seen_values:
+                continue
+            seen_values.add(value.lower())
+            label = str(key).replace("_", " ").title()
+            lines.append(f"- {label}: {value}")
+            extras += 1
+
+        return lines
+
+    def build(self, contact_data):
+        """
+        Build the recipient context lines for a prompt.
+
+        Args:
+            contact_data: Contact data from CSV and/or LinkedIn
+
+        Returns:
+            str: Newline-separated "- Label: value" lines within the token budget
+        """
+        kept = []
+        used_tokens = 0
+        dropped = 0
+        for line in self.candidate_lines(contact_data):
+            tokens = estimate_tokens(line)
+            if used_tokens + tokens > self.token_budget:
+                dropped += 1
+                continue
+            kept.append(line)
+            used_tokens += tokens
+
+        if dropped:
+            with self.lock:
+                self.stats["dropped"] += dropped
+        return "\n".join(kept)
+
+    def record_prompt(self, prompt, bucket_size=50):
+        """Add a rendered prompt's estimated token count to the run histogram."""
+        tokens = estimate_tokens(prompt)
+        with self.lock:
+            self.histogram[tokens // bucket_size * bucket_size] += 1
+            self.stats["prompts"] += 1
+            self.stats["total_tokens"] += tokens
+            self.stats["max_tokens"] = max(self.stats["max_tokens"], tokens)
+
+    def histogram_report(self, bucket_size=50):
+        """Return the prompt-token histogram as report lines."""
+        if not self.stats["prompts"]:
+            return "No prompts sent."
+
+        average = self.stats["total_tokens"] / self.stats["prompts"]
+        lines = [
+            f"Prompts: {self.stats['prompts']}, average tokens: {average:.0f}, "
+            f"max tokens: {self.stats['max_tokens']}, "
+            f"fields dropped for budget: {self.stats['dropped']}"
+        ]
+        peak = max(self.histogram.values())
+        for start in sorted(self.histogram):
+            count = self.histogram[start]
+            bar = "#" * max(1, round(count / peak * 40))
+            lines.append(f"{start:>5}-{start + bucket_size - 1:<5} {count:>6} {bar}")
+        return "\n".join(lines)
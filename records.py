@@ -0,0 +1,257 @@
+import json
+import tempfile
+import threading
+from collections.abc import MutableMapping
+
+# Additional Info strings at least this long, like any dict or list payload,
+# are kept out of the record
+INLINE_PAYLOAD_CHARS = 256
+
+
+class PayloadRef:
+    """Location of a payload in a PayloadStore."""
+
+    __slots__ = ("offset", "length")
+
+    def __init__(self, offset, length):
+        self.offset = offset
+        self.length = length
+
+
+class PayloadStore:
+    """
+    Keep bulky payloads (raw RocketReach responses) out of the records.
+
+    Payloads are appended as JSON to a temporary file and read back on
+    demand, so a record only holds a small PayloadRef.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.file = None
+
+    def put(self, payload):
+        """Store a JSON-serializable payload and return its PayloadRef."""
+        data = json.dumps(payload, default=str).encode("utf-8")
+        with self.lock:
+            if self.file is None:
+                self.file = tempfile.TemporaryFile()
+            self.file.seek(0, 2)
+            offset = self.file.tell()
+            self.file.write(data)
+        return PayloadRef(offset, len(data))
+
+    def get(self, ref):
+        """Read a payload back."""
+        with self.lock:
+            self.file.seek(ref.offset)
+            data = self.file.read(ref.length)
+        return json.loads(data.decode("utf-8"))
+
+
+class Record(MutableMapping):
+    """
+    Compact record that still behaves like the dict it replaces.
+
+    Subclasses list their fields in FIELDS as (attribute, key) pairs, where key
+    is the dict key existing code reads. Each field is a slot, so records carry
+    no per-instance __dict__; an unset slot is a missing key. Keys outside FIELDS
+    go in an "extra" dict, created on first use, if the record has that slot;
+    otherwise setting one raises KeyError. A field stored in a differently
+    named slot (through a property) lists that slot in STORAGE.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    STORAGE = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.ATTRIBUTES = {key: attribute for attribute, key in cls.FIELDS}
+        cls.SLOTS = tuple(
+            slot
+            for klass in reversed(cls.__mro__)
+            for slot in klass.__dict__.get("__slots__", ())
+        )
+        cls.HAS_EXTRA = "extra" in cls.SLOTS
+
+    def __init__(self, **values):
+        """
+        Args:
+            **values: Field values by attribute name
+        """
+        for attribute, value in values.items():
+            setattr(self, attribute, value)
+
+    @classmethod
+    def from_dict(cls, mapping):
+        """Build a record from a dict keyed like the one it replaces."""
+        record = cls()
+        for key, value in mapping.items():
+            record[key] = value
+        return record
+
+    def __getitem__(self, key):
+        attribute = self.ATTRIBUTES.get(key)
+        try:
+            if attribute is None:
+                return self.extra[key]
+            return getattr(self, attribute)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        attribute = self.ATTRIBUTES.get(key)
+        if attribute is not None:
+            setattr(self, attribute, value)
+        elif self.HAS_EXTRA:
+            try:
+                self.extra[key] = value
+            except AttributeError:
+                self.extra = {key: value}
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        attribute = self.ATTRIBUTES.get(key)
+        try:
+            if attribute is None:
+                del self.extra[key]
+            else:
+                delattr(self, attribute)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for attribute, key in self.FIELDS:
+            if hasattr(self, self.STORAGE.get(attribute, attribute)):
+                yield key
+        if self.HAS_EXTRA and hasattr(self, "extra"):
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def copy(self):
+        """Return a shallow copy of the record (payloads are shared, not copied)."""
+        record = type(self).__new__(type(self))
+        for slot in self.SLOTS:
+            if hasattr(self, slot):
+                setattr(record, slot, getattr(self, slot))
+        if self.HAS_EXTRA and hasattr(self, "extra"):
+            record.extra = dict(self.extra)
+        return record
+
+    def to_dict(self):
+        """Return the record as a plain dict (for JSON and pandas)."""
+        return dict(self.items())
+
+
+class EnrichmentResult(Record):
+    """A RocketReach lookup in the schema shared by every enrichment backend."""
+
+    __slots__ = (
+        "source",
+        "linkedin_url",
+        "name",
+        "emails",
+        "current_role",
+        "current_employer",
+        "raw",
+    )
+    FIELDS = tuple((field, field) for field in __slots__)
+
+
+class Profile(Record):
+    """
+    A scraped LinkedIn profile, keyed like the rows of linkedin_profiles_*.csv.
+
+    The raw RocketReach payload under "Additional Info" is kept in a shared
+    PayloadStore rather than in the record. Other columns (e.g. "Search Term"
+    in the CSVs) go in the extra dict.
+    """
+
+    __slots__ = (
+        "name",
+        "headline",
+        "location",
+        "about",
+        "valid_emails",
+        "current_position",
+        "current_employer",
+        "profile_url",
+        "payload",
+        "extra",
+    )
+    FIELDS = (
+        ("name", "Name"),
+        ("headline", "Headline"),
+        ("location", "Location"),
+        ("about", "About"),
+        ("valid_emails", "Valid Emails"),
+        ("current_position", "Current Position"),
+        ("current_employer", "Current Employer"),
+        ("profile_url", "Profile URL"),
+        ("additional_info", "Additional Info"),
+    )
+    STORAGE = {"additional_info": "payload"}
+    payloads = PayloadStore()
+
+    @property
+    def additional_info(self):
+        payload = self.payload
+        if isinstance(payload, PayloadRef):
+            return self.payloads.get(payload)
+        return payload
+
+    @additional_info.setter
+    def additional_info(self, value):
+        if isinstance(value, (dict, list)) or (
+            isinstance(value, str) and len(value) >= INLINE_PAYLOAD_CHARS
+        ):
+            value = self.payloads.put(value)
+        self.payload = value
+
+    @additional_info.deleter
+    def additional_info(self):
+        del self.payload
+
+    def contact_items(self):
+        """
+        Yield the profile's fields under contact data keys (e.g. valid_emails).
+
+        Extra columns are yielded in lowercase with underscores. The raw
+        payload is left out; read it with profile["Additional Info"].
+        """
+        for attribute, _ in self.FIELDS:
+            if attribute in self.STORAGE or not hasattr(self, attribute):
+                continue
+            yield attribute, getattr(self, attribute)
+        for key, value in getattr(self, "extra", {}).items():
+            yield key.lower().replace(" ", "_"), value
+
+
+class Contact(Record):
+    """
+    A contact's data, keyed by the standardized names of COLUMN_MAPPINGS.
+
+    Unmapped CSV columns and enrichment fields go in the record's extra dict.
+    """
+
+    __slots__ = (
+        "linkedin_url",
+        "email",
+        "name",
+        "company",
+        "position",
+        "location",
+        "about",
+        "aum",
+        "account_type",
+        "contact_type",
+        "extra",
+    )
+    FIELDS = tuple((field, field) for field in __slots__ if field != "extra")
@@ -1,5 +1,9 @@
 import os
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from dotenv import load_dotenv
 from selenium import webdriver
@@ -11,18 +15,53 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from diagnostics import DiagnosticsSink
+
 
 class RocketReachBrowser:
-    def __init__(self, email=None, password=None):
-        """Initialize the RocketReach browser automation with login credentials."""
+    def __init__(self, email=None, password=None, diagnostics=None, driver=None):
+        """
+        Initialize the RocketReach browser automation with login credentials.
+
+        Args:
+            email: RocketReach login email (defaults to ROCKETREACH_EMAIL)
+            password: RocketReach login password (defaults to ROCKETREACH_PASSWORD)
+            diagnostics: DiagnosticsSink for failed lookups (defaults to the shared sink)
+            driver: Existing WebDriver to borrow a tab from instead of starting Chrome
+        """
         load_dotenv()  # Load environment variables
         self.email = email or os.getenv("ROCKETREACH_EMAIL")
         self.password = password or os.getenv("ROCKETREACH_PASSWORD")
-        self.driver = None
+        self.diagnostics = diagnostics or DiagnosticsSink.default()
+        self.driver = driver
+        self.shared_driver = driver is not None
+        self.window_handle = None
         self.wait = None
 
+    @contextmanager
+    def _window(self):
+        """Switch to our tab for the duration of a block when sharing a driver."""
+        if not self.shared_driver:
+            yield
+            return
+
+        previous_handle = self.driver.current_window_handle
+        self.driver.switch_to.window(self.window_handle)
+        try:
+            yield
+        finally:
+            self.driver.switch_to.window(previous_handle)
+
     def setup_driver(self):
-        """Set up the Chrome WebDriver."""
+        """Set up the Chrome WebDriver, or open a tab in the shared one."""
+        if self.shared_driver:
+            previous_handle = self.driver.current_window_handle
+            self.driver.switch_to.new_window("tab")
+            self.window_handle = self.driver.current_window_handle
+            self.driver.switch_to.window(previous_handle)
+            self.wait = WebDriverWait(self.driver, 10)
+            return
+
         from selenium.webdriver.chrome.options import Options
         from selenium.webdriver.chrome.service import Service
         from webdriver_manager.chrome import ChromeDriverManager
@@ -50,6 +89,10 @@ class RocketReachBrowser:
 
     def login(self):
         """Log in to RocketReach."""
+        with self._window():
+            return self._login()
+
+    def _login(self):
         try:
             # Proceed with normal form login if cookie login
             self.driver.get("https://rocketreach.co/login")
@@ -133,147 +176,178 @@ class RocketReachBrowser:
             print(f"Error during RocketReach login: {e}")
             return False
 
-    def get_contact_email(self, linkedin_url):
-        """Navigate to RocketReach person page, click 'Get Contact Info' using JS, and return email."""
+    def get_contact_email(self, linkedin_url, timeout=30):
+        """
+        Navigate to RocketReach person page, click 'Get Contact Info' using JS, and return email.
+
+        A MutationObserver is installed before the click, so the async script
+        returns as soon as the email is rendered instead of polling for it.
+
+        Args:
+            linkedin_url: The LinkedIn profile URL
+            timeout: Seconds to wait for the button and then the email to appear
+
+        Returns:
+            Email address, or None if it could not be extracted
+        """
+        with self._window():
+            return self._get_contact_email(linkedin_url, timeout)
+
+    def _get_contact_email(self, linkedin_url, timeout):
         # Encode slashes in LinkedIn URL for RocketReach query param
         encoded_link = linkedin_url.replace("/", "%2F")
         url = f"https://rocketreach.co/person?start=1&pageSize=10&link={encoded_link}"
+        # get() returns once the document has loaded; the observer below waits
+        # for the client-side rendering, so no fixed sleep is needed here.
         self.driver.get(url)
-        # Allow some time for initial page load before executing script
-        time.sleep(5)
 
         # Debug: Print page title and URL to ensure we're on the right page
         print(f"Page loaded. Title: {self.driver.title}")
         print(f"Current URL: {self.driver.current_url}")
 
         # --- JavaScript Click Logic ---
-        # Refined script focusing on the specific button structure
+        # Watches the DOM for the button, clicks it once it is visible, then
+        # resolves with the email the moment a contact link is rendered.
         js_click_script = r"""
-        return (async () => {
-            var callback = arguments[arguments.length - 1];
-            var clicked = false;
-            var logMessages = [];
+        var timeoutMs = arguments[0];
+        var callback = arguments[arguments.length - 1];
+        var emailSelector = "a[data-testid='email-phone-text-mobile'], a[href^='mailto:']";
+        var emailPattern = /[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}/;
+        var clicked = false;
+        var finished = false;
+        var observer = null;
+        var timer = null;
+        var logMessages = [];
+
+        function finish(email) {
+            if (finished) {
+                return;
+            }
+            finished = true;
+            if (observer) {
+                observer.disconnect();
+            }
+            clearTimeout(timer);
+            console.log(logMessages.join('\n'));
+            callback({clicked: clicked, email: email});
+        }
+
+        function findEmail() {
+            var links = document.querySelectorAll(emailSelector);
+            for (var i = 0; i < links.length; i++) {
+                var text = (links[i].textContent || '').trim();
+                var match = text.match(emailPattern)
+                    || (links[i].getAttribute('href') || '').match(emailPattern);
+                if (match) {
+                    return match[0];
+                }
+            }
+            return null;
+        }
 
-            logMessages.push('Looking for span[data-onboarding-id="get-contact-button"]...');
-            // Try finding the specific span first
+        function findVisibleButton() {
             var targetSpan = document.querySelector('span[data-onboarding-id="get-contact-button"]');
-
             if (!targetSpan) {
-                logMessages.push('Span with data-onboarding-id="get-contact-button" not found.');
-            } else {
-                logMessages.push('Span found. Looking for button inside...');
-                // Look for a button, prioritizing common classes if needed, otherwise any button
-                var button = targetSpan.querySelector('button.button-primary') || targetSpan.querySelector('button');
+                return null;
+            }
+            var button = targetSpan.querySelector('button.button-primary') || targetSpan.querySelector('button');
+            if (!button) {
+                return null;
+            }
+            var rect = button.getBoundingClientRect();
+            var computedStyle = window.getComputedStyle(button);
+            var isVisible = (
+                rect.width > 0 &&
+                rect.height > 0 &&
+                computedStyle.visibility !== 'hidden' &&
+                computedStyle.display !== 'none' &&
+                computedStyle.opacity !== '0' &&
+                button.offsetParent !== null
+            );
+            return isVisible ? button : null;
+        }
+
+        function clickButton(button) {
+            logMessages.push('Button found. Text: "' + (button.textContent || '').trim() + '". Clicking...');
+            button.scrollIntoView({ block: 'center', inline: 'center' });
+            try {
+                button.click();
+                logMessages.push('Standard click successful.');
+            } catch (e1) {
+                logMessages.push('Standard click failed: ' + e1.message + '. Trying dispatchEvent...');
+                button.dispatchEvent(new MouseEvent('click', {
+                    view: window,
+                    bubbles: true,
+                    cancelable: true
+                }));
+            }
+            clicked = true;
+        }
 
+        function check() {
+            if (finished) {
+                return;
+            }
+            if (!clicked) {
+                var button = findVisibleButton();
                 if (!button) {
-                    logMessages.push('Button not found within the target span.');
-                } else {
-                    logMessages.push('Button found within span. Text: "' + (button.textContent || button.innerText || '').trim() + '". Checking visibility...');
-
-                    // Robust visibility check
-                    var rect = button.getBoundingClientRect();
-                    var computedStyle = window.getComputedStyle(button);
-                    var isVisible = (
-                        rect.width > 0 &&
-                        rect.height > 0 &&
-                        computedStyle.visibility !== 'hidden' &&
-                        computedStyle.display !== 'none' &&
-                        computedStyle.opacity !== '0' &&
-                        button.offsetParent !== null // Check if it's part of the layout
-                    );
-
-                    logMessages.push('Button visibility: ' + isVisible);
-
-                    if (isVisible) {
-                        logMessages.push('Attempting to click visible button...');
-                        try {
-                            button.scrollIntoView({ block: 'center', inline: 'center' });
-                            await new Promise(resolve => setTimeout(resolve, 200)); // Slightly longer delay after scroll
-
-                            // Attempt 1: Standard click
-                            button.click();
-                            clicked = true;
-                            logMessages.push('Standard click successful.');
-
-                        } catch (e1) {
-                            logMessages.push('Standard click failed: ' + e1.message + '. Trying dispatchEvent...');
-                            try {
-                                // Attempt 2: Dispatch MouseEvent
-                                var clickEvent = new MouseEvent('click', {
-                                    view: window,
-                                    bubbles: true,
-                                    cancelable: true
-                                });
-                                button.dispatchEvent(clickEvent);
-                                clicked = true; // Assume success if dispatch doesn't error immediately
-                                logMessages.push('dispatchEvent click successful.');
-                            } catch (e2) {
-                                logMessages.push('dispatchEvent click also failed: ' + e2.message);
-                                clicked = false; // Definitely failed
-                            }
-                        }
-                    } else {
-                        logMessages.push('Button found but determined to be not visible.');
-                    }
+                    return;
+                }
+                try {
+                    clickButton(button);
+                } catch (e) {
+                    logMessages.push('Click failed: ' + e.message);
+                    finish(null);
+                    return;
                 }
             }
-
-            if (!clicked) {
-                logMessages.push('Button click was not successful.');
+            var email = findEmail();
+            if (email) {
+                logMessages.push('Email rendered: ' + email);
+                finish(email);
             }
-
-            console.log(logMessages.join('\n'));
-            callback(clicked);
-        })();
+        }
+
+        observer = new MutationObserver(check);
+        observer.observe(document.documentElement, {
+            childList: true,
+            subtree: true,
+            characterData: true,
+            attributes: true,
+            attributeFilter: ['href', 'class', 'style']
+        });
+        timer = setTimeout(function () {
+            logMessages.push(clicked ? 'Timed out waiting for email.' : 'Timed out waiting for a visible button.');
+            finish(null);
+        }, timeoutMs);
+        check();
         """
 
         email = None
         try:
             print(
-                "Executing JavaScript to find and click the visible 'Get Contact Info' button..."
-            )
-            # Ensure page is fully loaded - increase wait time slightly before script exec
-            WebDriverWait(self.driver, 20).until(  # Increased wait to 20s
-                lambda d: d.execute_script("return document.readyState") == "complete"
+                "Waiting for the 'Get Contact Info' button and the email it reveals..."
             )
+            # Leave headroom over the in-page timer so it always fires first.
+            # The driver may be the scraper's, so its own timeout is put back.
+            previous_timeout = self.driver.timeouts.script
+            self.driver.set_script_timeout(timeout + 5)
+            try:
+                outcome = self.driver.execute_async_script(
+                    js_click_script, timeout * 1000
+                )
+            finally:
+                self.driver.set_script_timeout(previous_timeout)
 
-            # Set script timeout for async script
-            self.driver.set_script_timeout(30)  # Allow 30s for the async script itself
-
-            # Execute the script using execute_async_script
-            click_performed = self.driver.execute_async_script(js_click_script)
-
-            if click_performed:
+            if not outcome or not outcome.get("clicked"):
                 print(
-                    "JavaScript reported a click was performed. Waiting for email to appear..."
+                    "JavaScript execution finished, but no visible button was clicked."
                 )
-                # Wait longer for the email element to potentially load after the JS click
-                try:
-                    email_element = WebDriverWait(self.driver, 30).until(
-                        EC.presence_of_element_located(
-                            (
-                                By.CSS_SELECTOR,
-                                # Combined selector for potential email links
-                                "a[data-testid='email-phone-text-mobile'], a[href^='mailto:']",
-                            )
-                        )
-                    )
-                    email = email_element.text.strip()
-                    if not email or "@" not in email:
-                        print(
-                            "Email element found but no valid email address extracted."
-                        )
-                        email = None
-                    else:
-                        print(f"Successfully extracted email: {email}")
-                except TimeoutException:
-                    print("Email element not found after JavaScript click (timed out).")
-                except Exception as e:
-                    print(f"Error extracting email after JavaScript click: {e}")
+            elif outcome.get("email"):
+                email = outcome["email"].strip()
+                print(f"Successfully extracted email: {email}")
             else:
-                print(
-                    "JavaScript execution finished, but reported that no visible button was clicked."
-                )
+                print("Email element not found after JavaScript click (timed out).")
 
         except Exception as e:
             print(
@@ -285,27 +359,272 @@ class RocketReachBrowser:
         # Debugging and final return
         if email:
             return email
-        else:
-            # Add more info to the failure message
-            print(
-                "Failed to extract email using JavaScript click method. Check browser console for detailed logs from the script."
-            )
-            # Save screenshot if we failed to get email
-            page_snippet = self.driver.page_source[:1000]  # Increased snippet size
-            print(f"Page source snippet (first 1000 chars): {page_snippet}")
-            try:
-                screenshot_path = "debug_screenshot.png"
-                self.driver.save_screenshot(screenshot_path)
-                print(f"Screenshot saved to {screenshot_path} for debugging.")
-            except Exception as e:
-                print(f"Error saving screenshot: {e}")
-            return None
+
+        print(
+            "Failed to extract email using JavaScript click method. Check browser console for detailed logs from the script."
+        )
+        saved_to = self.diagnostics.capture(
+            self.driver, linkedin_url, reason="email not extracted"
+        )
+        if saved_to:
+            print(f"Page source and screenshot queued for debugging: {saved_to}.*")
+        return None
+
+    def is_alive(self):
+        """Check that the browser is still responsive and logged in."""
+        if not self.driver:
+            return False
+        try:
+            if (
+                self.shared_driver
+                and self.window_handle not in self.driver.window_handles
+            ):
+                return False
+            with self._window():
+                current_url = self.driver.current_url
+        except Exception:
+            return False
+        return "/login" not in current_url
 
     def close_driver(self):
-        """Close the WebDriver."""
-        if self.driver:
+        """Close the WebDriver, or just our tab when the driver is shared."""
+        if not self.driver:
+            return
+
+        if not self.shared_driver:
             self.driver.quit()
             print("Browser closed.")
+            return
+
+        try:
+            previous_handle = self.driver.current_window_handle
+            self.driver.switch_to.window(self.window_handle)
+            self.driver.close()
+            self.driver.switch_to.window(previous_handle)
+            print("RocketReach tab closed.")
+        except Exception as e:
+            print(f"Error closing RocketReach tab: {e}")
+        self.window_handle = None
+
+
+class PooledSession:
+    """A logged-in RocketReachBrowser plus its throughput counters."""
+
+    def __init__(self, session_id, browser):
+        self.session_id = session_id
+        self.browser = browser
+        self.created_at = time.time()
+        self.lookups = 0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.busy_seconds = 0.0
+
+    def stats(self):
+        """Return the session counters as a dictionary."""
+        per_minute = self.lookups / self.busy_seconds * 60 if self.busy_seconds else 0
+        return {
+            "session_id": self.session_id,
+            "lookups": self.lookups,
+            "successes": self.successes,
+            "failures": self.failures,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "lookups_per_minute": round(per_minute, 2),
+            "age_seconds": round(time.time() - self.created_at, 2),
+        }
+
+
+class RocketReachBrowserPool:
+    """
+    Pool of pre-logged-in RocketReachBrowser sessions behind a queue.
+
+    Exposes the same setup_driver/login/get_contact_email/close_driver interface
+    as RocketReachBrowser, but lets several get_contact_email() calls run at once.
+    """
+
+    # Callers may issue lookups from several threads at once
+    concurrent = True
+
+    def __init__(
+        self,
+        size=2,
+        browser_factory=RocketReachBrowser,
+        max_lookups_per_session=50,
+        max_consecutive_failures=3,
+    ):
+        """
+        Args:
+            size: Number of browser sessions to keep logged in
+            browser_factory: Callable returning a new RocketReachBrowser
+            max_lookups_per_session: Recycle a session after this many lookups
+            max_consecutive_failures: Recycle a session after this many failures in a row
+        """
+        self.size = size
+        self.browser_factory = browser_factory
+        self.max_lookups_per_session = max_lookups_per_session
+        self.max_consecutive_failures = max_consecutive_failures
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.live_sessions = 0
+        # Replacements still starting; checkouts wait for them
+        self.pending_sessions = 0
+        self.closed = False
+        self.next_session_id = 0
+        self.retired_stats = []
+        self.sessions = {}
+
+    def _create_session(self):
+        """Start and log in a new browser, returning a PooledSession or None."""
+        with self.lock:
+            self.next_session_id += 1
+            session_id = self.next_session_id
+
+        browser = self.browser_factory()
+        try:
+            browser.setup_driver()
+            if not browser.login():
+                browser.close_driver()
+                return None
+        except Exception as e:
+            print(f"Error starting RocketReach session {session_id}: {e}")
+            browser.close_driver()
+            return None
+
+        session = PooledSession(session_id, browser)
+        with self.lock:
+            self.sessions[session_id] = session
+            self.live_sessions += 1
+        return session
+
+    def _retire_session(self, session, reason):
+        print(f"Recycling RocketReach session {session.session_id}: {reason}")
+        with self.lock:
+            self.sessions.pop(session.session_id, None)
+            self.retired_stats.append(session.stats())
+            self.live_sessions -= 1
+        try:
+            session.browser.close_driver()
+        except Exception as e:
+            print(f"Error closing RocketReach session {session.session_id}: {e}")
+
+    def _replace_session(self, session, reason):
+        # Counted as pending before the old session stops being live, so the
+        # pool never looks empty while a replacement is on its way
+        with self.lock:
+            self.pending_sessions += 1
+        self._retire_session(session, reason)
+        # Logging in takes a while; the caller goes back to its lookup result
+        threading.Thread(
+            target=self._start_replacement,
+            name=f"rr-replace-{session.session_id}",
+            daemon=True,
+        ).start()
+
+    def _start_replacement(self):
+        replacement = None
+        try:
+            replacement = self._create_session()
+        finally:
+            with self.lock:
+                self.pending_sessions -= 1
+                closed = self.closed
+        if replacement and closed:
+            self._retire_session(replacement, "pool closed")
+        elif replacement:
+            self.idle.put(replacement)
+
+    def setup_driver(self):
+        """Start every session in parallel; logging in happens here as well."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            sessions = list(
+                executor.map(lambda _: self._create_session(), range(self.size))
+            )
+
+        for session in sessions:
+            if session:
+                self.idle.put(session)
+        print(
+            f"RocketReach pool started with {self.live_sessions}/{self.size} sessions"
+        )
+
+    def login(self):
+        """Sessions log in as they start, so report whether any are available."""
+        return self.live_sessions > 0
+
+    def _checkout(self, timeout):
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            with self.lock:
+                if self.live_sessions == 0 and self.pending_sessions == 0:
+                    raise RuntimeError("No logged-in RocketReach sessions available")
+            try:
+                session = self.idle.get(timeout=1)
+            except queue.Empty:
+                if deadline is not None and time.time() > deadline:
+                    raise TimeoutError("Timed out waiting for a RocketReach session")
+                continue
+
+            if session.browser.is_alive():
+                return session
+            self._replace_session(session, "failed health check")
+
+    def get_contact_email(self, linkedin_url, timeout=None):
+        """
+        Look up an email on the next free session.
+
+        Args:
+            linkedin_url: The LinkedIn profile URL
+            timeout: Seconds to wait for a free session (None waits forever)
+
+        Returns:
+            Email address, or None if the lookup failed
+        """
+        session = self._checkout(timeout)
+        started = time.time()
+        email = None
+        try:
+            email = session.browser.get_contact_email(linkedin_url)
+        except Exception as e:
+            print(f"Error on RocketReach session {session.session_id}: {e}")
+
+        session.busy_seconds += time.time() - started
+        session.lookups += 1
+        if email:
+            session.successes += 1
+            session.consecutive_failures = 0
+        else:
+            session.failures += 1
+            session.consecutive_failures += 1
+
+        if session.lookups >= self.max_lookups_per_session:
+            self._replace_session(session, f"reached {session.lookups} lookups")
+        elif session.consecutive_failures >= self.max_consecutive_failures:
+            self._replace_session(
+                session, f"{session.consecutive_failures} consecutive failures"
+            )
+        else:
+            self.idle.put(session)
+        return email
+
+    def session_stats(self):
+        """Return throughput counters for live and recycled sessions."""
+        with self.lock:
+            live = [session.stats() for session in self.sessions.values()]
+            return live + list(self.retired_stats)
+
+    def close_driver(self):
+        """Close every session in the pool."""
+        with self.lock:
+            self.closed = True
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            self._retire_session(session, "pool closed")
+
+        for stats in self.session_stats():
+            print(
+                f"RocketReach session {stats['session_id']}: {stats['lookups']} lookups, "
+                f"{stats['successes']} emails, {stats['lookups_per_minute']} lookups/min"
+            )
 
 
 # Example Usage (optional)
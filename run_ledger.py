@@ -0,0 +1,103 @@
+import csv
+import json
+import threading
+import time
+
+# Holds any contact fields that were not in the body CSV's header
+OTHER_FIELDS = "other_fields"
+
+
+class RunLedger:
+    """
+    Append-only JSONL record of every contact's outcome.
+
+    Each record is written and flushed as soon as the contact is finished, so
+    memory use does not grow with the run and the results so far survive a
+    crash or Ctrl-C. The file holds one run: an existing file is overwritten,
+    so the report never picks up an earlier run's records.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSONL file to write (replaced if it exists)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8")
+        self.records = 0
+
+    def write(self, record):
+        """Append one record (a JSON-serializable dict) to the ledger."""
+        record = {"time": time.time(), **record}
+        line = json.dumps(record, default=str, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.records += 1
+
+    def __iter__(self):
+        """Read the ledger back, one record at a time."""
+        with self.lock:
+            self.file.flush()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def close(self):
+        """Close the ledger file."""
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class BodyCSVWriter:
+    """
+    Write --body-to-csv rows to disk as they are produced.
+
+    The columns are the given fields, or else those of the first row; fields
+    outside them are kept as JSON in the other_fields column. Newlines in the
+    body are HTML encoded so the emails render properly when viewed.
+    """
+
+    def __init__(self, path, fields=None):
+        """
+        Args:
+            path: CSV file to create (opened on the first row)
+            fields: Column names (default: the keys of the first row)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.writer = None
+        self.fields = list(fields) if fields else None
+        self.rows = 0
+
+    def write(self, entry):
+        """Append one email (a dict with email, subject, body and contact fields)."""
+        entry = dict(entry)
+        if entry.get("body"):
+            entry["body"] = entry["body"].replace("\n", "<br>")
+
+        with self.lock:
+            if self.writer is None:
+                self.fields = list(self.fields or entry) + [OTHER_FIELDS]
+                self.file = open(self.path, "w", newline="", encoding="utf-8")
+                self.writer = csv.DictWriter(self.file, fieldnames=self.fields)
+                self.writer.writeheader()
+
+            extra = {
+                key: entry.pop(key) for key in list(entry) if key not in self.fields
+            }
+            if extra:
+                entry[OTHER_FIELDS] = json.dumps(extra, default=str, ensure_ascii=False)
+            self.writer.writerow(entry)
+            self.file.flush()
+            self.rows += 1
+
+    def close(self):
+        """Close the CSV file."""
+        with self.lock:
+            if self.file and not self.file.closed:
+                self.file.close()
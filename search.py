@@ -2,10 +2,11 @@ import os
 
 from dotenv import load_dotenv
 
-from linkedin_scraper import LinkedInScraper
-
 
 def main():
+    # Imported here so the browser stack only loads when the search runs
+    from linkedin_scraper import LinkedInScraper
+
     # Load environment variables
     load_dotenv()
 
@@ -47,7 +48,12 @@ def main():
         num_profiles = 5
 
     # Initialize the scraper with RocketReach API key
-    scraper = LinkedInScraper(email, password, rr_api_key=rr_api_key)
+    scraper = LinkedInScraper(
+        email,
+        password,
+        rr_api_key=rr_api_key,
+        rr_browser_mode=os.getenv("RR_BROWSER_MODE", "window"),
+    )
 
     # If browser method is selected, force fallback mode
     if not use_api:
@@ -0,0 +1,133 @@
+import re
+
+from prompt_context import contact_name, is_empty
+from template_renderer import field_value
+
+# Tokens Claude is asked to leave in a segment's email, filled in per row
+FIRST_NAME_TOKEN = "{{first_name}}"
+COMPANY_TOKEN = "{{company}}"
+
+AUM_MULTIPLIERS = {"k": 1e3, "m": 1e6, "mm": 1e6, "b": 1e9, "bn": 1e9, "t": 1e12}
+AUM_BUCKETS = [
+    (1e8, "under $100M"),
+    (1e9, "$100M-$1B"),
+    (1e10, "$1B-$10B"),
+    (1e11, "$10B-$100B"),
+    (float("inf"), "$100B+"),
+]
+
+
+def parse_aum(value):
+    """Parse an AUM value such as "$1.5B", "500MM" or "2,000,000" into dollars."""
+    match = re.search(
+        r"([\d,.]+)\s*(k|mm|m|bn|b|t)?\b", str(value).lower().replace("$", "")
+    )
+    if not match:
+        return None
+    try:
+        amount = float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+    return amount * AUM_MULTIPLIERS.get(match.group(2), 1)
+
+
+def aum_bucket(value):
+    """Return a coarse AUM range label, or None if the value can't be parsed."""
+    if is_empty(value):
+        return None
+    amount = parse_aum(value)
+    if amount is None:
+        return None
+    for upper, label in AUM_BUCKETS:
+        if amount < upper:
+            return label
+
+
+def canonical(value):
+    """Lowercase a value and collapse punctuation and whitespace."""
+    if value is None:
+        return ""
+    return " ".join(re.sub(r"[^\w$+-]+", " ", str(value).lower()).split())
+
+
+def segment_key(contact_data):
+    """
+    Return the part of a contact's context that shapes the email, ignoring the
+    name and employer: title, account (firm) type, contact type, AUM bucket and
+    whether a company is known. Returns None if the contact has no title.
+    """
+    position = field_value(contact_data, "position")
+    if not position:
+        return None
+    return (
+        canonical(position),
+        canonical(field_value(contact_data, "account_type")),
+        canonical(field_value(contact_data, "contact_type")),
+        aum_bucket(field_value(contact_data, "aum")) or "",
+        field_value(contact_data, "company") is not None,
+    )
+
+
+def segment_contact(contact_data):
+    """Build the contact data sent to Claude on behalf of a whole segment."""
+    segment = {
+        "name": FIRST_NAME_TOKEN,
+        "position": field_value(contact_data, "position"),
+    }
+    for field in ("account_type", "contact_type"):
+        value = field_value(contact_data, field)
+        if value:
+            segment[field] = value
+    bucket = aum_bucket(field_value(contact_data, "aum"))
+    if bucket:
+        segment["aum"] = bucket
+    if field_value(contact_data, "company") is not None:
+        segment["company"] = COMPANY_TOKEN
+    return segment
+
+
+def fill_tokens(email, contact_data):
+    """
+    Substitute one contact's first name and company into a segment's email.
+
+    Returns:
+        str: The email for this contact, or None if the segment's email lacks
+        the first-name token (Claude didn't follow the instructions)
+    """
+    if FIRST_NAME_TOKEN not in email:
+        return None
+    name = contact_name(contact_data)
+    first_name = name.split()[0] if name != "N/A" else "there"
+    email = email.replace(FIRST_NAME_TOKEN, first_name)
+    if COMPANY_TOKEN in email:
+        company = field_value(contact_data, "company")
+        if company is None:
+            return None
+        email = email.replace(COMPANY_TOKEN, company)
+    return email
+
+
+def group_segments(contacts):
+    """
+    Group contacts whose prompts would differ only by name and employer.
+
+    Args:
+        contacts: Contact data dictionaries
+
+    Returns:
+        tuple: (dict of segment key -> list of contact positions, list of
+        positions of contacts that have no segment)
+    """
+    segments = {}
+    singles = []
+    for position, contact_data in enumerate(contacts):
+        key = segment_key(contact_data)
+        if key is None:
+            singles.append(position)
+        else:
+            segments.setdefault(key, []).append(position)
+
+    # A segment of one saves nothing, and its email can use the real name
+    for key in [key for key, members in segments.items() if len(members) == 1]:
+        singles.extend(segments.pop(key))
+    return segments, singles
@@ -0,0 +1,149 @@
+import queue
+import smtplib
+import threading
+import time
+
+# Codes meaning the server is closing the connection; the message can be retried
+# on a fresh one
+RECONNECT_CODES = {421}
+
+
+class PooledConnection:
+    """An authenticated SMTP connection and how many messages it has sent."""
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.opened_at = time.time()
+
+
+class SMTPPool:
+    """
+    Keep authenticated SMTP connections open and reuse them across messages.
+
+    Connections are opened lazily, up to size of them. A connection that is
+    dropped or answers 421 is replaced and the message retried on the new one;
+    connections are also recycled after max_messages_per_connection messages,
+    since most servers limit how many they accept per session.
+    """
+
+    def __init__(
+        self,
+        host,
+        port=587,
+        username=None,
+        password=None,
+        size=1,
+        max_messages_per_connection=100,
+        starttls=True,
+        timeout=30,
+    ):
+        """
+        Args:
+            host: SMTP server
+            port: SMTP port
+            username: Login user; no login is attempted if empty
+            password: Login password
+            size: Most connections to keep open at once
+            max_messages_per_connection: Messages sent before a connection is replaced
+            starttls: Upgrade connections with STARTTLS before logging in
+            timeout: Socket timeout in seconds
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_messages_per_connection = max_messages_per_connection
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.stats = {"messages": 0, "connections": 0, "reconnects": 0, "recycled": 0}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._count("connections")
+        return PooledConnection(smtp)
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    def _checkout(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _checkin(self, connection):
+        if self.closed or connection.messages_sent >= self.max_messages_per_connection:
+            if not self.closed:
+                self._count("recycled")
+            self._discard(connection)
+        else:
+            self.idle.put(connection)
+
+    def send_message(self, msg, retries=1):
+        """
+        Send a message over a pooled connection.
+
+        Args:
+            msg: email.message.Message to send
+            retries: Times to retry on a fresh connection after a drop or 421
+
+        Raises:
+            smtplib.SMTPException or OSError if the message could not be sent
+        """
+        with self.slots:
+            for attempt in range(retries + 1):
+                connection = self._checkout()
+                try:
+                    connection.smtp.send_message(msg)
+                except (smtplib.SMTPServerDisconnected, OSError) as e:
+                    error = e
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code not in RECONNECT_CODES:
+                        self._checkin(connection)
+                        raise
+                    error = e
+                except smtplib.SMTPException:
+                    # e.g. refused recipients; the connection itself is fine
+                    self._checkin(connection)
+                    raise
+                else:
+                    connection.messages_sent += 1
+                    self._count("messages")
+                    self._checkin(connection)
+                    return
+
+                # The connection is unusable; replace it and try again
+                connection.smtp.close()
+                if attempt == retries:
+                    raise error
+                self._count("reconnects")
+
+    def close(self):
+        """Quit every idle connection; connections in use are closed on return."""
+        self.closed = True
+        while True:
+            try:
+                self._discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+
+from enrichment import canonical_linkedin_url
+
+
+def normalize_email(email):
+    """Normalize an email address for comparison (trimmed, lowercase, no mailto:)."""
+    email = str(email).strip().lower()
+    if email.startswith("mailto:"):
+        email = email[len("mailto:") :]
+    return email
+
+
+def recipient_keys(email=None, linkedin_url=None):
+    """
+    Return the suppression keys identifying a recipient.
+
+    Args:
+        email: Email address, if known
+        linkedin_url: LinkedIn profile URL, if known
+
+    Returns:
+        list: "email:<address>" and/or "linkedin:<canonical url>" keys
+    """
+    keys = []
+    if email:
+        keys.append(f"email:{normalize_email(email)}")
+    if linkedin_url:
+        keys.append(f"linkedin:{canonical_linkedin_url(linkedin_url).lower()}")
+    return keys
+
+
+def digest(key):
+    """Hash a key to the 64-bit integer stored in the index."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class SuppressionIndex:
+    """
+    Persistent set of recipients who must not be emailed again.
+
+    Recipients are stored as 8-byte BLAKE2b digests of their normalized email
+    addresses and canonical LinkedIn URLs, in a sorted array written to disk as
+    raw bytes: a million recipients take 8 MB and a lookup is a binary search.
+    Next to the persistent index, claim() tracks the recipients already taken
+    by this run, so a person listed twice is only processed once.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: File holding the index (None keeps it in memory only)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.digests = array("Q")
+        self.pending = set()  # Digests added since the index was last saved
+        self.claimed = set()  # Digests claimed by this run
+        self.stats = {"suppressed": 0, "duplicates": 0, "added": 0}
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                self.digests.frombytes(f.read())
+            if sys.byteorder == "big":
+                self.digests.byteswap()
+
+    def __len__(self):
+        return len(self.digests) + len(self.pending)
+
+    def _contains(self, value):
+        position = bisect_left(self.digests, value)
+        return (
+            position < len(self.digests) and self.digests[position] == value
+        ) or value in self.pending
+
+    def contains(self, keys):
+        """Check whether any of a recipient's keys is suppressed."""
+        values = [digest(key) for key in keys]
+        with self.lock:
+            return any(self._contains(value) for value in values)
+
+    def claim(self, keys):
+        """
+        Take a recipient for this run.
+
+        Args:
+            keys: The recipient's keys, from recipient_keys()
+
+        Returns:
+            str: None if the recipient is free (its keys are now claimed),
+            "suppressed" if it is in the index, or "duplicate" if this run
+            already claimed it
+        """
+        values = [digest(key) for key in keys]
+        with self.lock:
+            if any(self._contains(value) for value in values):
+                self.stats["suppressed"] += 1
+                return "suppressed"
+            if any(value in self.claimed for value in values):
+                self.stats["duplicates"] += 1
+                return "duplicate"
+            self.claimed.update(values)
+        return None
+
+    def release(self, keys):
+        """Give back a claim whose row was not sent, so a later duplicate can be."""
+        values = [digest(key) for key in keys]
+        with self.lock:
+            self.claimed.difference_update(values)
+
+    def add(self, keys):
+        """Suppress a recipient in future runs (written out by save())."""
+        values = [digest(key) for key in keys]
+        with self.lock:
+            for value in values:
+                if not self._contains(value):
+                    self.pending.add(value)
+                    self.stats["added"] += 1
+
+    def import_file(self, path):
+        """
+        Suppress every email address or LinkedIn URL listed in a text file.
+
+        Args:
+            path: File with one email address or LinkedIn URL per line
+
+        Returns:
+            int: Number of entries read
+        """
+        count = 0
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                value = line.strip().strip(",").strip('"')
+                if "linkedin.com/" in value.lower():
+                    self.add(recipient_keys(linkedin_url=value))
+                elif "@" in value:
+                    self.add(recipient_keys(email=value))
+                else:
+                    continue
+                count += 1
+        return count
+
+    def save(self):
+        """Merge newly added recipients into the sorted index and write it out."""
+        with self.lock:
+            if self.pending:
+                merged = set(self.digests)
+                merged.update(self.pending)
+                self.digests = array("Q", sorted(merged))
+                self.pending.clear()
+            if not self.path:
+                return
+            data = array("Q", self.digests)
+            if sys.byteorder == "big":
+                data.byteswap()
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data.tobytes())
+            os.replace(temp_path, self.path)
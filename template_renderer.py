@@ -0,0 +1,161 @@
+import re
+import threading
+
+from prompt_context import contact_name, is_empty
+
+# {{field}} or {{field:"default"}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w+)\s*(?::\s*"([^"]*)")?\s*\}\}')
+
+# The default template marks the recipient's role and employer as "xxx at xxxxxxx"
+SLOT_PATTERN = re.compile(r"(?:\bdoing )?\bxxx at xxxxxxx\b")
+
+# Keys a placeholder's value may be stored under, as in prompt_context.RANKED_FIELDS
+FIELD_ALIASES = {
+    "position": ["position", "Title", "current_position"],
+    "company": ["company", "Account Name", "current_employer"],
+    "aum": ["aum", "AUM"],
+    "account_type": ["account_type", "Account Type"],
+    "contact_type": ["contact_type", "Contact Type"],
+    "location": ["location", "Location"],
+}
+
+# Longer values are usually free text (headlines, descriptions) that read badly
+# when pasted into a sentence, so those rows go to Claude instead
+MAX_VALUE_CHARS = {"position": 60, "company": 80, "aum": 20}
+
+# Columns that request Claude personalization for a row
+RICH_FLAG_KEYS = ["rich_personalization", "Rich Personalization", "personalize"]
+TRUTHY_VALUES = {"1", "true", "yes", "y", "x"}
+
+
+class MissingField(Exception):
+    """Raised while rendering when a row lacks a value the template needs."""
+
+
+def field_value(contact_data, field):
+    """Return a contact field as a clean string, or None if it is missing."""
+    if field == "first_name":
+        name = contact_name(contact_data)
+        return name.split()[0] if name != "N/A" else None
+    if field == "name":
+        name = contact_name(contact_data)
+        return name if name != "N/A" else None
+
+    for key in FIELD_ALIASES.get(field, [field]):
+        value = contact_data.get(key)
+        if is_empty(value) or isinstance(value, (dict, list)):
+            continue
+        value = " ".join(str(value).split())
+        if len(value) > MAX_VALUE_CHARS.get(field, 120):
+            return None
+        return value
+    return None
+
+
+def required(field):
+    def render(contact_data):
+        value = field_value(contact_data, field)
+        if value is None:
+            raise MissingField(field)
+        return value
+
+    return render
+
+
+def optional(field, default):
+    def render(contact_data):
+        value = field_value(contact_data, field)
+        return default if value is None else value
+
+    return render
+
+
+def role_slot(contact_data):
+    """Render "xxx at xxxxxxx" as the recipient's title and firm (and AUM if known)."""
+    position = required("position")(contact_data)
+    company = required("company")(contact_data)
+    aum = field_value(contact_data, "aum")
+    if aum:
+        company = f"{company} ({aum} AUM)"
+    return f"{position} at {company}"
+
+
+class LocalRenderer:
+    """
+    Fill an email template from a contact's structured fields, without Claude.
+
+    The template is compiled once into a list of literal strings and field
+    renderers, so rendering a row is a handful of dictionary lookups. render()
+    returns None for rows that need Claude: those missing a required field,
+    or flagged for rich personalization.
+    """
+
+    def __init__(self, template):
+        """
+        Args:
+            template: Email template with {{field:"default"}} placeholders and
+                an optional "xxx at xxxxxxx" role slot
+        """
+        self.template = template
+        self.parts = self.compile(template)
+        self.stats = {"local": 0, "missing_fields": 0, "flagged": 0}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def compile(template):
+        """Split a template into literal strings and field-rendering callables."""
+        parts = []
+        tokens = re.compile(f"{PLACEHOLDER_PATTERN.pattern}|{SLOT_PATTERN.pattern}")
+        position = 0
+        for match in tokens.finditer(template):
+            parts.append(template[position : match.start()])
+            field, default = match.group(1), match.group(2)
+            if field is None:
+                # "doing xxx at xxxxxxx" becomes "as <title> at <firm>"
+                if match.group(0).startswith("doing "):
+                    parts.append("as ")
+                parts.append(role_slot)
+            elif default is None:
+                parts.append(required(field))
+            else:
+                parts.append(optional(field, default))
+            position = match.end()
+        parts.append(template[position:])
+        return [part for part in parts if part != ""]
+
+    @staticmethod
+    def is_flagged(contact_data):
+        """Check whether a row asks for rich (Claude) personalization."""
+        return any(
+            str(contact_data.get(key, "")).strip().lower() in TRUTHY_VALUES
+            for key in RICH_FLAG_KEYS
+        )
+
+    def render(self, contact_data):
+        """
+        Render the template for one contact.
+
+        Args:
+            contact_data: Contact data from CSV and/or LinkedIn
+
+        Returns:
+            str: The filled-in email, or None if the row should go to Claude
+        """
+        if self.is_flagged(contact_data):
+            with self.lock:
+                self.stats["flagged"] += 1
+            return None
+
+        try:
+            email = "".join(
+                part if isinstance(part, str) else part(contact_data)
+                for part in self.parts
+            )
+        except MissingField:
+            with self.lock:
+                self.stats["missing_fields"] += 1
+            return None
+
+        with self.lock:
+            self.stats["local"] += 1
+        return email